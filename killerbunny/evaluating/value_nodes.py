@@ -205,6 +205,15 @@ class VNodeList:
             for vnode in self:
                 yield vnode.jpath
         return paths_generator()
+    
+    def values_list(self) -> list[JSON_ValueType]:
+        """Return a list of the values of this VNodeList. Prefer this to list(values()) when all values are needed. """
+        return [vnode.jvalue for vnode in self._node_list]
+    
+    def paths_list(self) -> list[NormalizedJPath]:
+        """Return a list of the NormalizedJPath paths of this VNodeList. Prefer this to list(paths()) when all paths
+        are needed. """
+        return [vnode.jpath for vnode in self._node_list]
         
         
     ############################
@@ -280,8 +289,14 @@ class StringValue(EvaluatorValue):
     def __init__(self, value: str) -> None:
         if not isinstance(value, str):
             raise TypeError(f"Expected str, got {type(value)}")
+        if len(value) < 2 or value[0] not in ('"', "'") or value[-1] != value[0]:
+            raise ValueError(f"Expected a quoted string literal, got {value!r}")
         super().__init__()
         content_to_unescape = value[1:-1]  # remove quotes
+        if '\\' not in content_to_unescape:
+            # no escape sequences, which is the common case, so there is nothing to unescape
+            self._value = content_to_unescape
+            return
         # todo a string literal won't always be a member name, e.g., 'red' in :  ?@.color == 'red'
         # we need to further research rules for converting string literals that aren't member names.
         member_name = unescape_string_content(content_to_unescape)
@@ -343,10 +358,13 @@ class BooleanValue(EvaluatorValue):
         Returns True if they are considered equal under these rules, False otherwise.
         Returns NotImplemented if the comparison cannot be performed (e.g., if bool(other) fails).
         """
+        if self is other:
+            return True
+        
         if isinstance(other, BooleanValue):
             return self._value == other._value
         
-        if isinstance(other, bool): # Python's native bool
+        if other is True or other is False: # Python's native bool
             return self._value == other
         
         # For any other type, compare our boolean value to the truthiness of 'other'.
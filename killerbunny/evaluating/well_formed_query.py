@@ -26,6 +26,7 @@ _logger = logging.getLogger(__name__)
 class WellFormedValidQuery:
     
     _query_node: 'ASTNode'
+    _evaluator:  JPathEvaluator
     
     def __init__(self, query_node: 'ASTNode') -> None:
         """Users should not instantiate this class directly and should instead use the factory method
@@ -36,6 +37,8 @@ class WellFormedValidQuery:
         if query_node is None:
             raise ValueError("query_node cannot be None")
         self._query_node = query_node
+        # JPathEvaluator holds no state between visits, so one instance serves every call to eval()
+        self._evaluator = JPathEvaluator()
         
     @classmethod
     def from_str(cls, jpath_query_string: str) -> 'WellFormedValidQuery':
@@ -58,10 +61,12 @@ class WellFormedValidQuery:
     
     def eval(self, root_value: 'JSON_ValueType') -> 'VNodeList':
         context = Context.root(root_value)
-        rt_result =  JPathEvaluator().visit(self._query_node, context )
+        rt_result =  self._evaluator.visit(self._query_node, context )
         if rt_result.error:
             _logger.warning(rt_result.error.as_string())
             raise rt_result.error  # todo remove in production. We fail-fast during development
-        assert rt_result.value is not None
+        if __debug__:
+            if rt_result.value is None:
+                raise AssertionError(f"Evaluation returned no errors, but value is None for {self._query_node!r}")
         output_value = context.get_symbol(JPATH_QUERY_RESULT_NODE_KEY)
         return output_value
@@ -17,6 +17,8 @@ _CONTROL_CHARS: set[str]  = { chr(cntl) for cntl in range(0x00, 0x20) }
 _ESCAPE_REQUIRED: set[str] = set().union(_REVERSE_SOLIDUS, _QUOTATION_MARK, *_CONTROL_CHARS)
 
 SCALAR_TYPES = (str, bool, int, float, NoneType)
+# For exact-type checks, e.g. type(foo) in SCALAR_TYPE_SET. Subclasses of the scalar types are not members.
+SCALAR_TYPE_SET: frozenset[type] = frozenset(SCALAR_TYPES)
 JSON_SCALARS: TypeAlias = Union[None, str, int, float, bool]
 JSON_VALUES:  TypeAlias = Union[JSON_SCALARS, dict[str, "JSON_VALUES"], list["JSON_VALUES"]]
 
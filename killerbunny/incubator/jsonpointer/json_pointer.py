@@ -1,9 +1,10 @@
 """Testing implementation of a json pointer"""
+import functools
 import re
-from typing import Any
+from typing import Any, Sequence
 
 from killerbunny.incubator.jsonpointer.constants import JSON_VALUES, _ESCAPED_SOLIDUS, \
-    _ESCAPED_TILDE, _TOKEN_SEPARATOR, EMPTY_STRING, END_OF_ARRAY_TOKEN, _ARRAY_INDEX_RE, SCALAR_TYPES
+    _ESCAPED_TILDE, _TOKEN_SEPARATOR, EMPTY_STRING, END_OF_ARRAY_TOKEN, SCALAR_TYPE_SET
 
 """
 To represent a json object as a string, you must escape the json dict_ - specifically the strings in the json dict_
@@ -48,14 +49,31 @@ def path_components(path: str) -> list[str]:
     return ref_tokens
 
 
-def subpath(path: list[str] | str, path_component_index:int = -1) -> str:
+def subpath(path: Sequence[str] | str, path_component_index:int = -1) -> str:
     """Return the subpath composed of first N reference tokens, where N == path_component_index argument.
     If path_component_index == -1. return the full path.
     """
-    reference_tokens = path
-    if isinstance(path, str):
-        reference_tokens = path_components(path)
-    return _TOKEN_SEPARATOR.join(token for token in reference_tokens[:path_component_index+1])
+    reference_tokens = path_components(path) if isinstance(path, str) else path
+    if path_component_index == -1:
+        return _TOKEN_SEPARATOR.join(reference_tokens)
+    return _TOKEN_SEPARATOR.join(reference_tokens[:path_component_index+1])
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_pointer(path: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Return the reference tokens of path and their unescaped forms. Cached so that pointers resolved repeatedly, e.g.
+    by resolve_json_pointer_bulk(), are only split and unescaped once."""
+    ref_tokens = tuple(path_components(path))
+    return ref_tokens, tuple(unescape_ref_token(ref_token) for ref_token in ref_tokens)
+
+
+def _is_array_index(ref_token: str) -> bool:
+    """Return True if ref_token is a valid array index: 0, or ASCII digits with no leading zero.
+    Equivalent to _ARRAY_INDEX_RE.fullmatch() for everything but the END_OF_ARRAY_TOKEN, without the regex engine."""
+    if ref_token == '0':
+        return True
+    return ref_token.isdigit() and ref_token.isascii() and ref_token[0] != '0'
+
 
 """
 todo - error handling. We could have different modes of operation, e.g
@@ -74,14 +92,17 @@ def resolve_json_pointer(json_obj: JSON_VALUES, path: str) -> Any:
         # address this dict key
         return json_obj
     cur_node = json_obj
-    ref_tokens = path_components(path)
+    # per RFC6901, reference tokens are unescaped before evaluation
+    ref_tokens, unesc_tokens = _compile_pointer(path)
     last_path_index = len(ref_tokens) - 1
+    # bind globals used in the loop to locals
+    is_array_index = _is_array_index
+    scalar_type_set = SCALAR_TYPE_SET
+    end_of_array_token = END_OF_ARRAY_TOKEN
     #print(f"ref_tokens = {ref_tokens}")
-    for index, ref_token in enumerate(ref_tokens):
-        if index == 0 and ref_token == EMPTY_STRING:
+    for index, unesc_path in enumerate(unesc_tokens):
+        if index == 0 and unesc_path == EMPTY_STRING:
             continue  # first token in list of len > 1, this is just the root dict_ ref, so skip
-        # per RFC6901
-        unesc_path = unescape_ref_token(ref_token)
         if isinstance(cur_node, dict):
             if unesc_path not in cur_node:
                 raise KeyError(f"Invalid dict key '{unesc_path}' in path '{subpath(ref_tokens,index)}'")
@@ -92,29 +113,23 @@ def resolve_json_pointer(json_obj: JSON_VALUES, path: str) -> Any:
             # to be handled, if it is to be useful. Temp use : return the length of the array.
             # todo - longer term, what does array[-] mean???
             list_length = len(cur_node)
-            if unesc_path == END_OF_ARRAY_TOKEN:
+            if unesc_path == end_of_array_token:
                 cur_node = list_length
             else:
-                i: int = 0
                 # Per RFC7901 section 4, array indexes cannot have leading zeros
-                if not _ARRAY_INDEX_RE.fullmatch(unesc_path):
+                if not is_array_index(unesc_path):
                     zero_msg = ""
                     if unesc_path.startswith('0'):
                         zero_msg = f". Leading zeros are not allowed in list indexes."
                     raise IndexError(f"Invalid list index format '{unesc_path}' in path "
                                      f"'{subpath(ref_tokens,index)}'{zero_msg}")
-                try:
-                    i = int(unesc_path)
-                    if  i >= list_length or i < 0:
-                        raise IndexError(f"Invalid list index {i} in path "
-                                         f"'{subpath(ref_tokens,index)}' for list of length {list_length}")
-                    cur_node = cur_node[int(unesc_path)]
-                except ValueError:
-                    # raise ... from None prevents chaining the ValueError from the int(unsec_path), which we are handling here
-                    raise ValueError(f"Invalid list index type:{type(unesc_path).__name__} in path "
-                                     f"'{subpath(ref_tokens,index)}'") from None
-
-        elif isinstance(cur_node, SCALAR_TYPES):
+                i = int(unesc_path)  # cannot raise, is_array_index() only accepts ASCII digits
+                if  i >= list_length:
+                    raise IndexError(f"Invalid list index {i} in path "
+                                     f"'{subpath(ref_tokens,index)}' for list of length {list_length}")
+                cur_node = cur_node[i]
+
+        elif type(cur_node) in scalar_type_set:
             # terminal node, should align with end of path
             # todo error handling if more path components left to process
             if index != last_path_index:
@@ -122,10 +137,16 @@ def resolve_json_pointer(json_obj: JSON_VALUES, path: str) -> Any:
         else:
             raise TypeError(f"Encountered non JSON type: {type(cur_node)}")
         #print(f"index is {index} and {unesc_path=}, {cur_node=}")
-        if isinstance(cur_node, SCALAR_TYPES) and index != last_path_index:
+        if type(cur_node) in scalar_type_set and index != last_path_index:
             #print(f"*********** TERMINAL NODE REACHED, BUT PATH CONTINUES *****")
             raise ValueError(f"Invalid path reference '{subpath(ref_tokens,index+1)}', last good value: '{cur_node}' "
                              f"for path '{subpath(ref_tokens,index)}'")
 
     #print(f"resolve_json_pointer: path = {path}")
     return cur_node
+
+
+def resolve_json_pointer_bulk(json_obj: JSON_VALUES, paths: Sequence[str]) -> list[Any]:
+    """Return the values referenced by each json_pointer path in paths, in the same order. Raises the same exceptions
+    as resolve_json_pointer() for the first invalid path."""
+    return [resolve_json_pointer(json_obj, path) for path in paths]
@@ -1,20 +1,41 @@
+import functools
 import logging
-from typing import NamedTuple
+import re
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Iterator, cast
 
-from killerbunny.incubator.jsonpointer.constants import JSON_SCALARS, SCALAR_TYPES, JSON_VALUES, OPEN_BRACE, \
-    CLOSE_BRACE, \
+from killerbunny.incubator.jsonpointer.constants import JSON_SCALARS, SCALAR_TYPES, SCALAR_TYPE_SET, JSON_VALUES, \
+    OPEN_BRACE, CLOSE_BRACE, \
     SPACE, COMMA, EMPTY_STRING, CLOSE_BRACKET, OPEN_BRACKET
 
 _logger = logging.getLogger(__name__)
 
-# todo recursive code for printing list and dict members needs to detect cycles and have a maximum recursion depth
-class FormatFlags(NamedTuple):
+# Translation table for escaping str content as a JSON string per RFC 8259, section 7. Quotation mark, reverse solidus,
+# and the control characters U+0000 through U+001F must be escaped. The control characters with a two-character
+# escape sequence use it, all others use the six-character \u00XX form.
+_JSON_ESCAPE_TABLE = str.maketrans({
+    **{ chr(cntl): f"\\u{cntl:04x}" for cntl in range(0x00, 0x20) },
+    '"':  '\\"',
+    '\\': '\\\\',
+    '\b': '\\b',
+    '\f': '\\f',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+# matches any character that _JSON_ESCAPE_TABLE translates, so strings without one can skip translation entirely
+_NEEDS_ESCAPE_RE = re.compile(r'["\\\x00-\x1f]')
+
+@dataclass(frozen=True, slots=True)
+class FormatFlags:
     """Flags for various pretty printing options for Python nested JSON objects.
 
     The default flags are designed for debugging small nested dicts, and as_json_format() is useful for initializing
     flags for printing in a JSON-compatible format.
 
     The various "with_xxx()" methods make a copy of this instance's flags and allow you to set a specific flag.
+    Instances are immutable and hashable. The flags are read for every formatted value, so this is a slots dataclass
+    rather than a NamedTuple, whose field access is slower.
     """
     quote_strings: bool = False  # when True wrap strings in quotes, when False omits quotes
     single_quotes: bool = False  # when True use single quotes instead of double quotes
@@ -39,26 +60,19 @@ class FormatFlags(NamedTuple):
                            single_line=False, omit_commas=False)
 
     def with_indent(self, indent: int) -> "FormatFlags":
-        return FormatFlags(quote_strings=self.quote_strings, single_quotes=self.single_quotes,
-                           use_repr=self.use_repr, format_json=self.format_json, indent=indent,
-                           single_line=self.single_line, omit_commas=self.omit_commas)
+        return replace(self, indent=indent)
 
     def with_quote_strings(self, quote_strings: bool) -> "FormatFlags":
-        return FormatFlags(quote_strings=quote_strings, single_quotes=self.single_quotes,  use_repr=self.use_repr,
-                           format_json=self.format_json, indent=self.indent, single_line=self.single_line, omit_commas=self.omit_commas)
+        return replace(self, quote_strings=quote_strings)
 
     def with_single_quotes(self, single_quotes: bool) -> "FormatFlags":
-        return FormatFlags(quote_strings=self.quote_strings, single_quotes=single_quotes,  use_repr=self.use_repr,
-                           format_json=self.format_json, indent=self.indent, single_line=self.single_line, omit_commas=self.omit_commas)
+        return replace(self, single_quotes=single_quotes)
 
     def with_use_repr(self, use_repr: bool) -> "FormatFlags":
-        return FormatFlags(quote_strings=self.quote_strings, single_quotes=self.single_quotes,  use_repr=use_repr,
-                           format_json=self.format_json, indent=self.indent, single_line=self.single_line, omit_commas=self.omit_commas)
+        return replace(self, use_repr=use_repr)
 
     def with_format_json(self, format_json: bool) -> "FormatFlags":
-        return FormatFlags(quote_strings=self.quote_strings, single_quotes=self.single_quotes,
-                           use_repr=self.use_repr, format_json=format_json, indent=self.indent,
-                           single_line=self.single_line, omit_commas=self.omit_commas)
+        return replace(self, format_json=format_json)
 
     def with_single_line(self, single_line: bool) -> "FormatFlags":
         """Copy existing flags and set single_line flag to argument value.
@@ -66,13 +80,10 @@ class FormatFlags(NamedTuple):
         Note: if single_line is True, this method also sets omit_commas to False as a sensible default.
         """
         _omit_commas = False if single_line else self.omit_commas
-        return FormatFlags(quote_strings=self.quote_strings, single_quotes=self.single_quotes, use_repr=self.use_repr, format_json=self.format_json,
-                           indent=self.indent, single_line=single_line, omit_commas=_omit_commas)
+        return replace(self, single_line=single_line, omit_commas=_omit_commas)
 
     def with_omit_commas(self, omit_commas: bool) -> "FormatFlags":
-        return FormatFlags(quote_strings=self.quote_strings, single_quotes=self.single_quotes,
-                           use_repr=self.use_repr, format_json=self.format_json, indent=self.indent,
-                           single_line=self.single_line, omit_commas=omit_commas)
+        return replace(self, omit_commas=omit_commas)
 
 
 def format_scalar(scalar_obj: JSON_SCALARS, format_: FormatFlags) -> str:
@@ -98,41 +109,124 @@ def format_scalar(scalar_obj: JSON_SCALARS, format_: FormatFlags) -> str:
 
     :return: The formatted object as a str, or 'None'/'null' if the `scalar_obj` argument is None
     """
-    # no quotes used around JSON null, true, false literals
-    if scalar_obj is None:
-        return 'null' if format_.format_json else 'None'
-    if isinstance(scalar_obj, bool):
-        if format_.format_json:
-            return "true" if scalar_obj else "false"
-        else:
-            return str(scalar_obj)  # str() and repr() return same string for bool
+    formatter = _SCALAR_FORMATTERS.get(type(scalar_obj))
+    if formatter is not None:
+        return formatter(scalar_obj, format_)
+    # subclasses of the scalar types are formatted like their base type
+    for base_type, formatter in _SCALAR_FORMATTERS.items():
+        if isinstance(scalar_obj, base_type):
+            return formatter(scalar_obj, format_)
+    return _format_other(scalar_obj, format_)
+
+
+# Formatters used by format_scalar() for each scalar type. Each handles exactly one type, so needs no type checks.
+# no quotes used around JSON null, true, false literals
+# indexed by format_.format_json, then for bool by the value. str() and repr() return same string for None and bool
+_NONE_STRS = ('None', 'null')
+_BOOL_STRS = (('False', 'True'), ('false', 'true'))
+
+
+def _format_none(_: None, format_: FormatFlags) -> str:
+    return _NONE_STRS[format_.format_json]
 
-    quote_char = "'" if format_.single_quotes else '"'
 
+def _format_bool(scalar_obj: bool, format_: FormatFlags) -> str:
+    return _BOOL_STRS[format_.format_json][scalar_obj]
+
+
+def _format_str(scalar_obj: str, format_: FormatFlags) -> str:
     if format_.use_repr:
-        s = repr(scalar_obj)
-        if isinstance(scalar_obj, str):
-            # repr adds single quotes around the string, which we do not want.
-            s = s[1:-1]
-            # repr doesn't always escape a double quote in a str!
-            #   E.g.: repr() returns 'k"l' for "k"l", instead of "k\"l" which makes the JSON decoder fail.  Frustrating!
-            # todo investigate rules for valid JSON strings and issues with repr()
-            # todo do we need a regex for this to only replace " not preceded by a \ ?
-            s = s.replace('"', '\\"')
+        # repr() escapes strings using Python rules, not JSON rules: it doesn't always escape a double quote, it
+        #   escapes single quotes, and it uses \xXX escapes. E.g.: repr() returns 'k"l' for "k"l", instead of "k\"l"
+        #   which makes the JSON decoder fail. So we escape the string content ourselves.
+        #   Most strings contain nothing to escape, so skip the translation for them.
+        s = scalar_obj.translate(_JSON_ESCAPE_TABLE) if _NEEDS_ESCAPE_RE.search(scalar_obj) else scalar_obj
     else:
-        s = str(scalar_obj)
-    if isinstance(scalar_obj, str) and format_.quote_strings:
+        s = scalar_obj  # str() of a str is the same str
+    if format_.quote_strings:
+        quote_char = "'" if format_.single_quotes else '"'
         return f'{quote_char}{s}{quote_char}'
     return s
 
 
+def _format_other(scalar_obj: Any, format_: FormatFlags) -> str:
+    """Format int, float, and any other object"""
+    return repr(scalar_obj) if format_.use_repr else str(scalar_obj)
+
+
+# bool must precede int, as bool is a subclass of int
+_SCALAR_FORMATTERS: dict[type, Callable[[Any, FormatFlags], str]] = {
+    type(None): _format_none,
+    bool:       _format_bool,
+    int:        _format_other,
+    float:      _format_other,
+    str:        _format_str,
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _specialized_formatters(format_: FormatFlags) -> dict[type, Callable[[Any], str]]:
+    """Return one-argument formatters for each exact scalar type, equivalent to format_scalar(value, format_) for a
+    value of exactly that type. The flags are resolved once when the formatters are built instead of for every value.
+    Cached, as callers usually format many values with the same few FormatFlags."""
+    none_str = _NONE_STRS[format_.format_json]
+    quote_char = "'" if format_.single_quotes else '"'
+    escape_table = _JSON_ESCAPE_TABLE
+    needs_escape = _NEEDS_ESCAPE_RE.search
+
+    def format_none(_: None) -> str:
+        return none_str
+
+    def format_escaped(value: str) -> str:
+        return value.translate(escape_table) if needs_escape(value) else value
+
+    def format_quoted(value: str) -> str:
+        return f'{quote_char}{value}{quote_char}'
+
+    def format_escaped_quoted(value: str) -> str:
+        return f'{quote_char}{value.translate(escape_table) if needs_escape(value) else value}{quote_char}'
+
+    def format_unchanged(value: str) -> str:
+        return value
+
+    format_str: Callable[[str], str]
+    if format_.use_repr:
+        format_str = format_escaped_quoted if format_.quote_strings else format_escaped
+    else:
+        format_str = format_quoted if format_.quote_strings else format_unchanged
+
+    return {
+        type(None): format_none,
+        bool:       _BOOL_STRS[format_.format_json].__getitem__,
+        int:        str,  # str() and repr() return same string for int and float
+        float:      str,
+        str:        format_str,
+    }
+
 def _spacer(format_: FormatFlags, level: int) -> str:
     if format_.single_line:
         return SPACE
     return SPACE * ( format_.indent * level )
 
-def _is_empty_or_single_item(obj: JSON_VALUES ) -> bool:
-    """Recurse the list or dict and return True if every nested element is either empty or contains
+
+# The exact types of JSON values: list, dict, and the scalar types
+_JSON_TYPE_SET: frozenset[type] = SCALAR_TYPE_SET | {list, dict}
+
+
+def _json_type(value: Any) -> type | None:
+    """Return the JSON type of value: list, dict, or one of SCALAR_TYPES. A subclass returns its base type.
+    Return None if value is not a JSON type."""
+    value_type = type(value)
+    if value_type in _JSON_TYPE_SET:
+        return value_type
+    for base_type in (list, dict, *SCALAR_TYPES):  # bool precedes int in SCALAR_TYPES, as bool is a subclass of int
+        if isinstance(value, base_type):
+            return base_type
+    return None
+
+
+def _is_empty_or_single_item(obj: JSON_VALUES, memo: dict[int, bool] | None = None) -> bool:
+    """Walk the list or dict and return True if every nested element is either empty or contains
     exactly one scalar list element or one key/value pair where the value is a single scalar value.
     Another way to think of this is, if the structure does not require a comma, this method will return True
     E.g.
@@ -143,209 +237,426 @@ def _is_empty_or_single_item(obj: JSON_VALUES ) -> bool:
     [ [ [ "one", "two" ] ] ] - returns False
     { "key": [ [ "one", "two"  ] ] }  - returns False
     { "key": [ [ { "one":"foo", "two":"bar" } ] ] } - returns False
-    """
-    #base case:
-    if isinstance(obj, SCALAR_TYPES):
-        return True
-    if isinstance(obj, (list, dict)) and len(obj) == 0:
-        return True
-    if isinstance(obj, (dict, list)) and len(obj) > 1:
-        return False
-    elif isinstance(obj, list) and len(obj) == 1:
-        return _is_empty_or_single_item(obj[0])
-    elif isinstance(obj, dict) and len(obj) == 1:
-        return _is_empty_or_single_item(next(iter(obj.values())))
-    else:
-        return False
 
+    If a `memo` dict is passed, results for containers are cached in it by id(), so a nested container is only walked
+    once. The objects must stay alive while the memo is in use.
+    """
+    # walk down the chain of single item containers instead of recursing, so deep nesting cannot overflow the stack
+    chain: list[JSON_VALUES] = []  # containers whose result is the result of the whole chain
+    chain_ids: set[int] = set()
+    while True:
+        # one type() lookup instead of an isinstance() check per kind. Subclasses are mapped to their base type
+        obj_type: type | None = type(obj)
+        if obj_type not in _JSON_TYPE_SET:
+            obj_type = _json_type(obj)
+        if obj_type in SCALAR_TYPE_SET:
+            result = True
+            break
+        if memo is not None:
+            cached = memo.get(id(obj))
+            if cached is not None:
+                result = cached
+                break
+        if id(obj) in chain_ids:
+            result = False  # a container which contains itself is never a single item
+            break
+        chain.append(obj)
+        chain_ids.add(id(obj))
+        if obj_type is list:
+            json_list = cast(list[JSON_VALUES], obj)
+            if len(json_list) != 1:
+                result = len(json_list) == 0
+                break
+            obj = json_list[0]
+        elif obj_type is dict:
+            json_dict = cast(dict[str, JSON_VALUES], obj)
+            if len(json_dict) != 1:
+                result = len(json_dict) == 0
+                break
+            obj = next(iter(json_dict.values()))
+        else:
+            result = False  # not a JSON type
+            break
+    if memo is not None:
+        for container in chain:
+            memo[id(container)] = result
+    return result
+
+
+# pre-built tokens for the fixed parts of the output
+_KEY_SEPARATOR       = f":{SPACE}"  # between a key and a scalar value on the same line
+_EMPTY_DICT          = f"{OPEN_BRACE}{SPACE}{CLOSE_BRACE}"
+_EMPTY_LIST          = f"{OPEN_BRACKET}{SPACE}{CLOSE_BRACKET}"
+_OPEN_BRACE_SPACE    = f"{OPEN_BRACE}{SPACE}"
+_OPEN_BRACKET_SPACE  = f"{OPEN_BRACKET}{SPACE}"
+_SPACE_CLOSE_BRACE   = f"{SPACE}{CLOSE_BRACE}"
+_SPACE_CLOSE_BRACKET = f"{SPACE}{CLOSE_BRACKET}"
+
+_NUMBER_TYPE_SET: frozenset[type] = frozenset((int, float))  # exact types, so bool is not a member
+
+
+# Output is accumulated as a flat list of str tokens which is joined once when formatting is done, rather than by
+# concatenating onto the current line with `+=`. A line break and the indent of the next line are a single token:
+# "\n" and the indent for multi-line output, or a single space for single line output. When the caller's `lines` are
+# updated, this token is a _LineBreak instead, which is not a str, so _tokens_to_lines() can split the tokens back into
+# lines.
+class _LineBreak:
+    __slots__ = ("indent",)
+
+    def __init__(self, indent: str) -> None:
+        self.indent = indent  # the indent of the line that follows the line break
+
+_Token = str | _LineBreak
+
+
+def _tokens_to_lines(tokens: list[_Token]) -> list[str]:
+    lines: list[str] = []
+    line_start = 0
+    indent = EMPTY_STRING  # indent of the current line
+    for index, token in enumerate(tokens):
+        if type(token) is _LineBreak:
+            lines.append(indent + EMPTY_STRING.join(cast(list[str], tokens[line_start:index])))
+            indent = token.indent
+            line_start = index + 1
+    lines.append(indent + EMPTY_STRING.join(cast(list[str], tokens[line_start:])))
+    return lines
 
-# noinspection DuplicatedCode
-def _pp_dict(json_dict: dict[str, JSON_VALUES],
-             format_: FormatFlags,
-             lines: list[str],
-             level: int = 0,
-             instance_ids: dict[int, JSON_VALUES] | None = None,
-             ) -> list[str]:
-    
-    if not isinstance(json_dict, dict):
-        raise TypeError(f"Encountered non dict type: {type(json_dict)}")
-    if len(lines) == 0:
-        lines.append("")
 
+def _lead(format_: FormatFlags, lines: list[str], level: int) -> str:
+    """Return the text written before the opening brace or bracket of a container which starts on the last line of
+    `lines`."""
     if lines[-1] != EMPTY_STRING:
         # the current line already has text, so indent is relative to the end of that text
-        indent_str = SPACE * ( format_.indent - 1)
+        return SPACE * ( format_.indent - 1)
     elif len(lines) == 1 or level == 0:
-        indent_str = EMPTY_STRING
+        return EMPTY_STRING
     else:
-        indent_str = _spacer(format_, level)
-        
-    if instance_ids is None:
-        instance_ids = {}  # keeps track of instance ids to detect circular references
-        
-    if id(json_dict) in instance_ids:
-        # we have seen this list instance previously, cycle detected
-        _logger.warning(f"Cycle detected in json_dict: {json_dict}")
-        lines[-1] = f"{indent_str}{{...}}"
-        return lines
+        return _spacer(format_, level)
+
+
+_LINE_BREAK_CACHE_SIZE = 32  # nesting depth covered by _line_breaks(). _line_break() extends a copy for deeper levels
+
+
+def _line_break_tokens(format_: FormatFlags, split_lines: bool, levels: range) -> tuple[_Token, ...]:
+    """Return the line break token followed by the indent for each nesting level in `levels`. If split_lines is True,
+    the tokens are _LineBreak instances for _tokens_to_lines()."""
+    if split_lines:
+        return tuple( _LineBreak(_spacer(format_, level)) for level in levels )
+    line_break = EMPTY_STRING if format_.single_line else "\n"
+    return tuple( f"{line_break}{_spacer(format_, level)}" for level in levels )
+
+
+@functools.lru_cache(maxsize=32)
+def _line_breaks(format_: FormatFlags, split_lines: bool) -> tuple[_Token, ...]:
+    """Return the tuple where item `level` is the line break token for that nesting level. The tuple is shared by every
+    formatting call with the same flags, so it is immutable."""
+    return _line_break_tokens(format_, split_lines, range(_LINE_BREAK_CACHE_SIZE))
+
+
+# Formatted str values up to this length are cached for the rest of a formatting call. Longer strings are rarely
+# repeated, and hashing them would cost more than formatting them again.
+_STR_CACHE_MAX_LEN = 64
+
+
+class _PrintState:
+    """State shared by the _emit_xxx() functions during one formatting call."""
+    __slots__ = ("format_", "split_lines", "inline", "ancestor_ids", "line_breaks", "same_line_lead",
+                 "single_item_memo", "str_cache", "formatters")
+
+    def __init__(self, format_: FormatFlags, split_lines: bool, ancestor_ids: set[int] | None) -> None:
+        self.format_ = format_
+        self.split_lines = split_lines  # True if the tokens are split into lines by _tokens_to_lines()
+        # True if the output is one str on a single line, where every line break token is a single space
+        self.inline = format_.single_line and not split_lines
+        # ids of the containers whose items are being formatted, to detect circular references. Only the open
+        # containers are tracked, so a container that appears more than once without a cycle is formatted every time.
+        # None if cycles are not checked.
+        self.ancestor_ids = ancestor_ids
+        self.line_breaks = _line_breaks(format_, split_lines)  # line break token and indent, indexed by level
+        # written before a nested container which opens on a line that already has text
+        self.same_line_lead = SPACE * ( format_.indent - 1)
+        self.single_item_memo: dict[int, bool] = {}  # memo for _is_empty_or_single_item()
+        # str value or dict key -> format_scalar(value, format_). Records-style JSON repeats the same keys in every dict
+        self.str_cache: dict[str, str] = {}
+        self.formatters = _specialized_formatters(format_)  # exact scalar type -> formatter of values of that type
+
+    def format_str(self, value: str) -> str:
+        """Return format_scalar(value, self.format_) for a str value, cached if value is short."""
+        formatted = self.str_cache.get(value)
+        if formatted is None:
+            formatted = self.formatters[str](value)
+            if len(value) <= _STR_CACHE_MAX_LEN:
+                self.str_cache[value] = formatted
+        return formatted
+
+
+def _line_break(state: _PrintState, level: int) -> _Token:
+    """Return the line break token followed by the indent for the nesting level."""
+    line_breaks = state.line_breaks
+    if level >= len(line_breaks):
+        # deeper than the shared tuple, so extend this call's copy of it. Doubled, as deep nesting goes one level at a time
+        depth = max(level + 1, 2 * len(line_breaks))
+        line_breaks += _line_break_tokens(state.format_, state.split_lines, range(len(line_breaks), depth))
+        state.line_breaks = line_breaks
+    return line_breaks[level]
+
+
+class _Frame:
+    """A dict or list whose items are being formatted by _emit_container()."""
+    __slots__ = ("container", "is_dict", "items", "count", "index", "level")
+
+    def __init__(self, container: dict[str, JSON_VALUES] | list[JSON_VALUES], is_dict: bool, level: int) -> None:
+        self.container = container
+        self.is_dict = is_dict
+        self.items: Iterator[Any] = iter(container.items()) if is_dict else iter(container)  # type: ignore[union-attr]
+        self.count = len(container)
+        self.index = 0        # index of the next item to format
+        self.level = level    # nesting level of the items
+
+
+def _open_container(container: dict[str, JSON_VALUES] | list[JSON_VALUES],
+                    tokens: list[_Token],
+                    lead: _Token,
+                    level: int,
+                    state: _PrintState,
+                    ) -> _Frame | None:
+    """Append the opening tokens of the container and return a _Frame for formatting its items. Return None if the
+    container was formatted completely: a cycle, an empty container, or a container with a single scalar item.
+    `lead` is written before the opening brace or bracket."""
+    format_ = state.format_
+    ancestor_ids = state.ancestor_ids
+    is_dict = isinstance(container, dict)
+    if ancestor_ids is not None and id(container) in ancestor_ids:
+        # the container is one of its own ancestors, cycle detected
+        if is_dict:
+            _logger.warning(f"Cycle detected in json_dict: {container}")
+            tokens.extend((lead, "{...}"))
+        else:
+            _logger.warning(f"Cycle detected in json_list: {container}")
+            tokens.extend((lead, "[...]"))
+        return None
+
+    if is_dict:
+        if len(container) == 0:
+            tokens.extend((lead, _EMPTY_DICT))
+            return None
+        if len(container) == 1:
+            k, v = next(iter(container.items()))  # type: ignore[union-attr]
+            if isinstance(v, SCALAR_TYPES):
+                kf = state.format_str(k) if type(k) is str else format_scalar(k, format_)
+                vf = format_scalar(v, format_)
+                tokens.extend((lead, _OPEN_BRACE_SPACE, kf, _KEY_SEPARATOR, vf, _SPACE_CLOSE_BRACE))
+                return None
+        tokens.extend((lead, OPEN_BRACE))  # start of the dict text: '{'
     else:
-        instance_ids[id(json_dict)] = json_dict  # save for future cycle detection
-
-    if len(json_dict) == 0:
-        lines[-1] += f"{indent_str}{OPEN_BRACE}{SPACE}{CLOSE_BRACE}"
-        return lines
-    if len(json_dict) == 1:
-        k, v = next(iter(json_dict.items()))
-        if isinstance(v, SCALAR_TYPES):
-            kf = format_scalar(k, format_)
-            vf = format_scalar(v, format_)
-            lines[-1] += f"{indent_str}{OPEN_BRACE}{SPACE}{kf}:{SPACE}{vf}{SPACE}{CLOSE_BRACE}"
-            return lines
-
+        if len(container) == 0:
+            tokens.extend((lead, _EMPTY_LIST))
+            return None
+        if len(container) == 1 and isinstance(container[0], SCALAR_TYPES):  # type: ignore[index]
+            s = format_scalar(container[0], format_)  # type: ignore[index]
+            tokens.extend((lead, _OPEN_BRACKET_SPACE, s, _SPACE_CLOSE_BRACKET))
+            return None
+        # A list of only scalars is formatted with a single join. Not when splitting lines, which needs every
+        # _LineBreak as a separate token.
+        item_types = set(map(type, container)) if not state.split_lines else None
+        if item_types is not None and item_types <= SCALAR_TYPE_SET:
+            item_break = cast(str, _line_break(state, level + 1))
+            comma = EMPTY_STRING if format_.omit_commas else COMMA
+            separator = f"{comma}{item_break}"
+            items: Iterable[str]
+            if item_types <= _NUMBER_TYPE_SET:
+                # numeric arrays are common and may be large: str() and repr() are the same for int and float
+                items = map(str, container)
+            else:
+                fmt_str = state.format_str
+                formatters = state.formatters
+                items = [ fmt_str(item) if type(item) is str else formatters[type(item)](item) for item in container ]
+            body = separator.join(items)
+            tokens.extend((lead, OPEN_BRACKET, item_break, body, _line_break(state, level), CLOSE_BRACKET))
+            return None
+        tokens.extend((lead, OPEN_BRACKET))
+    if ancestor_ids is not None:
+        ancestor_ids.add(id(container))  # removed when the frame is popped
+    return _Frame(container, is_dict, level + 1)
+
+
+def _emit_container(container: dict[str, JSON_VALUES] | list[JSON_VALUES],
+                    tokens: list[_Token],
+                    lead: _Token,
+                    level: int,
+                    state: _PrintState,
+                    ) -> None:
+    """Append the tokens of the formatted container to `tokens`. `lead` is written before the opening brace or bracket.
+
+    Nested containers are formatted with an explicit stack of _Frame instead of recursion, so the nesting depth is not
+    limited by the interpreter's recursion limit. Single line output is formatted the same way, where every line break
+    token is a single space, and every container is closed by a space and its closing brace or bracket.
+    """
+    frame = _open_container(container, tokens, lead, level, state)
+    if frame is None:
+        return
+    # bind attributes and globals used in the loops to locals
+    format_ = state.format_
+    inline = state.inline
     comma = EMPTY_STRING if format_.omit_commas else COMMA
-    sp   = SPACE if format_.single_line else EMPTY_STRING
-    lines[-1] += f"{indent_str}{OPEN_BRACE}"  # start of the dict text: '{'
-
-    level += 1
-    indent_str = _spacer(format_, level)
-    for index, (key, value) in enumerate(json_dict.items()):
-
-        # deal with commas
-        # noinspection PyUnusedLocal
-        first_item: bool = (index == 0)
-        last_item:  bool = (index == (len(json_dict) - 1 ))  # no comma after the last item
-
-        kf = format_scalar(key, format_)  # formatted key
-        if isinstance(value, SCALAR_TYPES):
-            lines.append("")
-            vf = format_scalar(value, format_)
-            lines[-1] = f"{indent_str}{kf}:{SPACE}{vf}"
-        elif isinstance(value, list):
-            lines.append("")
-            lines[-1] = f"{indent_str}{kf}:"
-            # special case is where the value is either an empty list or a list with one scalar element.
-            # we can display this value on the same line as the key name.
-            if len(value) > 1:
-                lines.append("")
-            elif len(value) == 1:
-                # if there is only one single element or key/value pair, we print it on the same line.
-                if _is_empty_or_single_item(value):
-                   #lines[-1] += SPACE
-                    ...
-                else:
-                    lines.append("")
-            _pp_list(value, format_, lines, level, instance_ids)
-        elif isinstance(value, dict):
-            lines.append("")
-            lines[-1] = f"{indent_str}{kf}:"
-            # special case is where the value is either an empty dict or a dict with one key with a scalar value:
-            # we can display the nested dict on the same line as the key name of the parent dict.
-            if len(value) > 1:
-                lines.append("")
-            elif len(value) == 1:
-                nk, nv = next(iter(value.items()))
-                if not isinstance(nv, SCALAR_TYPES):
-                    lines.append("")
-            _pp_dict(value, format_, lines, level, instance_ids)
-
-        if not last_item:
-            lines[-1] +=  comma
-
-
-    if _is_empty_or_single_item(json_dict):
-        # this was a single item dict, so display closing brace on same line
-        lines[-1] += f"{SPACE}{CLOSE_BRACE}"
-    else:
-        level -= 1
-        indent_str = sp if format_.single_line else _spacer(format_, level)
-        lines.append(f"{indent_str}{CLOSE_BRACE}")
+    same_line_lead = state.same_line_lead  # for a nested container opened on a line that already has text
+    single_item_memo = state.single_item_memo
+    ancestor_ids = state.ancestor_ids
+    append = tokens.append
+    extend = tokens.extend
+    fmt = format_scalar
+    fmt_str = state.format_str
+    formatters = state.formatters
+    is_single_item = _is_empty_or_single_item
+    open_container = _open_container
+    line_break = _line_break
+    scalar_types = SCALAR_TYPES
+    json_type = _json_type
+    json_type_set = _JSON_TYPE_SET
+    stack: list[_Frame] = [frame]
+    while stack:
+        frame = stack[-1]
+        level = frame.level
+        count = frame.count
+        items = frame.items
+        index = frame.index
+        item_break = line_break(state, level)  # line break and indent written before each item
+        child: _Frame | None = None
+        if frame.is_dict:
+            while index < count:
+                if index:
+                    append(comma)  # separates this item from the previous one, which may be a closed container
+                index += 1
+                key, value = next(items)
+                kf = fmt_str(key) if type(key) is str else fmt(key, format_)  # formatted key
+                value_type: type | None = type(value)
+                if value_type not in json_type_set:
+                    value_type = json_type(value)  # a subclass, or None for an unsupported type
+                if value_type is str:
+                    extend((item_break, kf, _KEY_SEPARATOR, fmt_str(value)))
+                elif value_type is list:
+                    extend((item_break, kf, ":"))
+                    # special case is where the value is either an empty list or a list with one scalar element.
+                    # we can display this value on the same line as the key name.
+                    if len(value) > 1 or ( len(value) == 1 and not is_single_item(value, single_item_memo) ):
+                        child = open_container(value, tokens, item_break, level, state)
+                    else:
+                        child = open_container(value, tokens, same_line_lead, level, state)
+                elif value_type is dict:
+                    extend((item_break, kf, ":"))
+                    # special case is where the value is either an empty dict or a dict with one key with a scalar
+                    # value: we can display the nested dict on the same line as the key name of the parent dict.
+                    if len(value) > 1 or ( len(value) == 1 and not isinstance(next(iter(value.values())), scalar_types) ):
+                        child = open_container(value, tokens, item_break, level, state)
+                    else:
+                        child = open_container(value, tokens, same_line_lead, level, state)
+                elif value_type is not None:
+                    vf = formatters[value_type](value) if type(value) is value_type else fmt(value, format_)
+                    extend((item_break, kf, _KEY_SEPARATOR, vf))
+                if child is not None:
+                    break  # format the items of the nested container first
+        else:
+            while index < count:
+                if index:
+                    append(comma)  # separates this item from the previous one, which may be a closed container
+                index += 1
+                item = next(items)
+                item_type: type | None = type(item)
+                if item_type not in json_type_set:
+                    item_type = json_type(item)  # a subclass, or None for an unsupported type
+                if item_type is str:
+                    extend((item_break, fmt_str(item)))
+                elif item_type is list or item_type is dict:
+                    # the first item (index is already 1) opens on the same line as the parent's bracket if it is a container
+                    if index == 1:
+                        child = open_container(item, tokens, same_line_lead, level, state)
+                    else:
+                        child = open_container(item, tokens, item_break, level, state)
+                elif item_type is not None:
+                    s = formatters[item_type](item) if type(item) is item_type else fmt(item, format_)
+                    extend((item_break, s))
+                if child is not None:
+                    break  # format the items of the nested container first
+        frame.index = index
+
+        if child is not None:
+            stack.append(child)
+            continue
+
+        # all items done, close the container
+        if inline or ( count == 1 and is_single_item(frame.container, single_item_memo) ):
+            # this was a single item container, so display closing brace on same line
+            append(_SPACE_CLOSE_BRACE if frame.is_dict else _SPACE_CLOSE_BRACKET)
+        else:
+            extend((line_break(state, level - 1), CLOSE_BRACE if frame.is_dict else CLOSE_BRACKET))
+        stack.pop()
+        if ancestor_ids is not None:
+            ancestor_ids.remove(id(frame.container))
+
+
+def _emit_dict(json_dict: dict[str, JSON_VALUES],
+               tokens: list[_Token],
+               lead: str,
+               level: int,
+               state: _PrintState,
+               ) -> None:
+    """Append the tokens of the formatted json_dict to `tokens`. `lead` is written before the opening brace."""
+    if not isinstance(json_dict, dict):
+        raise TypeError(f"Encountered non dict type: {type(json_dict)}")
+    _emit_container(json_dict, tokens, lead, level, state)
 
 
-    return lines
+def _emit_list(json_list: list[JSON_VALUES],
+               tokens: list[_Token],
+               lead: str,
+               level: int,
+               state: _PrintState,
+               ) -> None:
+    """Append the tokens of the formatted json_list to `tokens`. `lead` is written before the opening bracket."""
+    if not isinstance(json_list, list):
+        raise TypeError(f"Encountered non list type: {type(json_list)}")
+    _emit_container(json_list, tokens, lead, level, state)
 
-# noinspection DuplicatedCode
-def _pp_list(json_list: list[JSON_VALUES],
+
+def _pp_dict(json_dict: dict[str, JSON_VALUES],
              format_: FormatFlags,
              lines: list[str],
              level: int = 0,
-             instance_ids: dict[int, JSON_VALUES] | None = None,
+             ancestor_ids: set[int] | None = None,
              ) -> list[str]:
-
-    if not isinstance(json_list, list):
-        raise TypeError(f"Encountered non list type: {type(json_list)}")
-
+    """Append the lines of the formatted json_dict to `lines` and return `lines`."""
     if len(lines) == 0:
         lines.append("")
+    if ancestor_ids is None:
+        ancestor_ids = set()  # keeps track of instance ids to detect circular references
+    tokens: list[_Token] = [lines[-1]]  # formatting only appends to the last line
+    _emit_dict(json_dict, tokens, _lead(format_, lines, level), level, _PrintState(format_, True, ancestor_ids))
+    lines[-1:] = _tokens_to_lines(tokens)
+    return lines
 
-    if lines[-1] != EMPTY_STRING:
-        # the current line already has text, so indent is relative to the end of that text
-        indent_str = SPACE * ( format_.indent - 1)
-    elif len(lines) == 1 or level == 0:
-        indent_str = EMPTY_STRING
-    else:
-        indent_str = _spacer(format_, level)
-    
-    if instance_ids is None:
-        instance_ids = {}  # keeps track of instance ids to detect circular references
-    
-    if id(json_list) in instance_ids:
-        # we have seen this list instance previously, cycle detected
-        _logger.warning(f"Cycle detected in json_list: {json_list}")
-        lines[-1] = f"{indent_str}[...]"
-        return lines
-    else:
-        instance_ids[id(json_list)] = json_list  # save for future cycle detection
-
-
-    if len(json_list) == 0:
-        lines[-1] += f"{indent_str}{OPEN_BRACKET}{SPACE}{CLOSE_BRACKET}"
-        return lines
-    if len(json_list) == 1 and isinstance(json_list[0], SCALAR_TYPES):
-        s = format_scalar(json_list[0], format_)
-        lines[-1] += f"{indent_str}{OPEN_BRACKET}{SPACE}{s}{SPACE}{CLOSE_BRACKET}"
-        return lines
-
-    comma = EMPTY_STRING if format_.omit_commas else COMMA
-    sp   = SPACE if format_.single_line else EMPTY_STRING
-    lines[-1] += f"{indent_str}{OPEN_BRACKET}"
-
-    level += 1
-    indent_str = _spacer(format_, level)
-    for index, item in enumerate(json_list):
-
-        first_item: bool = (index == 0)
-        last_item:  bool = (index == (len(json_list) - 1 ))  # no comma after the last element
-
-        if isinstance(item, SCALAR_TYPES):
-            lines.append("")
-            s = format_scalar(item, format_)
-            lines[-1] = f"{indent_str}{s}"
-        elif isinstance(item, list):
-            if not first_item:  # if this is a new list starting inside the list, open brackets can go on the same line
-                lines.append("")
-            _pp_list(item, format_, lines, level, instance_ids)
-        elif isinstance(item, dict):
-            if not first_item:  # if this is a new dict starting inside the list, open brackets can go on the same line
-                lines.append("")
-            _pp_dict(item, format_, lines, level, instance_ids)
-
-        if not last_item:
-            lines[-1] +=  comma
-
-    if _is_empty_or_single_item(json_list):
-        # this was a single element line, so display closing bracket on same line
-        lines[-1] += f"{SPACE}{CLOSE_BRACKET}"
-    else:
-        level -= 1
-        indent_str = sp if format_.single_line else _spacer(format_, level)
-        lines.append(f"{indent_str}{CLOSE_BRACKET}")
 
+def _pp_list(json_list: list[JSON_VALUES],
+             format_: FormatFlags,
+             lines: list[str],
+             level: int = 0,
+             ancestor_ids: set[int] | None = None,
+             ) -> list[str]:
+    """Append the lines of the formatted json_list to `lines` and return `lines`."""
+    if len(lines) == 0:
+        lines.append("")
+    if ancestor_ids is None:
+        ancestor_ids = set()  # keeps track of instance ids to detect circular references
+    tokens: list[_Token] = [lines[-1]]  # formatting only appends to the last line
+    _emit_list(json_list, tokens, _lead(format_, lines, level), level, _PrintState(format_, True, ancestor_ids))
+    lines[-1:] = _tokens_to_lines(tokens)
     return lines
 
+
 def pretty_print(json_obj: JSON_VALUES,
                  format_: FormatFlags,
                  lines: list[str] | None = None,
                  indent_level: int = 0,
+                 check_cycles: bool = True,
                  ) -> str:
     """Return the JSON value formatted as a str according to the flags in the format_ argument.
 
@@ -354,23 +665,34 @@ def pretty_print(json_obj: JSON_VALUES,
     When this method returns, the `lines` argument will contain each line in the formatted str, or a single new
     element if format_.single_line is True. These lines are then joined() and returned.
 
+    If check_cycles is True, a list or dict that contains itself is formatted as [...] or {...} and a warning is
+    logged. Pass False only when json_obj is known to be a tree, e.g. the result of json.loads(), to skip tracking the
+    ids of the containers being formatted. Formatting a value with a cycle when check_cycles is False never ends.
     """
-    if lines is None or len(lines) == 0:
-        lines = [""]   # so format methods will have a new starting line for output
-    
-    instance_ids: dict[int, JSON_VALUES] = {}  # keeps track of instance ids to detect circular references
-    
+    # the caller's lines are updated, so line breaks must be found again after formatting
+    split_lines = bool(lines)
+    tokens: list[_Token]
+    if lines:
+        tokens = [lines[-1]]  # formatting only appends to the last line
+        lead = _lead(format_, lines, indent_level)
+    else:
+        tokens = []
+        lead = EMPTY_STRING
+
     if isinstance(json_obj, SCALAR_TYPES):
-        lines[-1] = format_scalar(json_obj, format_)
-    elif isinstance(json_obj, list):
-        _pp_list(json_obj, format_, lines, indent_level, instance_ids)
-    elif isinstance(json_obj, dict):
-        _pp_dict(json_obj, format_, lines, indent_level, instance_ids)
+        # a scalar replaces the text of the current line
+        tokens = [format_scalar(json_obj, format_)]
+    elif isinstance(json_obj, (list, dict)):
+        state = _PrintState(format_, split_lines, set() if check_cycles else None)
+        _emit_container(json_obj, tokens, lead, indent_level, state)
     else:
         raise ValueError(f"Unsupported type: {type(json_obj)}")
 
+    if not lines:
+        return EMPTY_STRING.join(cast(list[str], tokens))
+
+    lines[-1:] = _tokens_to_lines(tokens)
     if format_.single_line:
         return "".join(lines)
     else:
         return "\n".join(lines)
-
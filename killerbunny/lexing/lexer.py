@@ -8,14 +8,68 @@
 
 """Scanner/tokenizer/lexer for JPath parser"""
 import re
-from typing import cast
 
 from killerbunny.shared.errors import Error, IllegalCharError, UnterminatedStringLiteralError
 from killerbunny.shared.position import Position
 from killerbunny.lexing.tokens import Token, TokenType, STRING_DELIMETER_LEXEME_SET, \
-    TWO_CHAR_LEXEMES_SET, TOKEN_LOOKUP_DICT, SINGLE_CHAR_LEXEMES_SET, JSON_KEYWORD_LEXEMES_SET
+    TWO_CHAR_TOKEN_TYPES, SINGLE_CHAR_TOKEN_TYPES, JSON_KEYWORD_TOKEN_TYPES
 from killerbunny.shared.jpath_bnf import JPathBNFConstants as bnf
 
+# The grammar patterns used by the lexer, compiled once at import instead of looked up in the re module's cache for
+# every token
+_SPACES_RE:                re.Pattern[str] = re.compile(bnf.SPACES)
+_STRING_SQ_RE:             re.Pattern[str] = re.compile(bnf.STRING_LITERAL_SINGLE_QUOTEABLE)
+_STRING_DQ_RE:             re.Pattern[str] = re.compile(bnf.STRING_LITERAL_DOUBLE_QUOTEABLE)
+_MEMBER_NAME_SHORTHAND_RE: re.Pattern[str] = re.compile(bnf.MEMBER_NAME_SHORTHAND)
+_SLICE_SELECTOR_RE:        re.Pattern[str] = re.compile(bnf.SLICE_SELECTOR)
+_INT_RE:                   re.Pattern[str] = re.compile(bnf.INT)
+_NUMBER_RE:                re.Pattern[str] = re.compile(bnf.NUMBER)
+
+# first char -> second char -> TokenType of the two char lexeme, e.g. '=' -> { '=': TokenType.EQUAL }. Matching a two
+# char lexeme looks up the two chars in place instead of slicing them from the text.
+_TWO_CHAR_TOKEN_TYPE_LOOKUP: dict[str, dict[str, TokenType]] = {
+    first_char: { item.lexeme[1]: item for item in TWO_CHAR_TOKEN_TYPES if item.lexeme[0] == first_char }
+    for first_char in { item.lexeme[0] for item in TWO_CHAR_TOKEN_TYPES }
+}
+
+# single char lexeme -> TokenType, e.g. '$' -> TokenType.DOLLAR
+_SINGLE_CHAR_TOKEN_TYPE_LOOKUP: dict[str, TokenType] = { item.lexeme: item for item in SINGLE_CHAR_TOKEN_TYPES }
+
+# keyword lexeme -> TokenType, e.g. 'true' -> TokenType.TRUE. Any other name scans as an IDENTIFIER
+_KEYWORD_TOKEN_TYPE_LOOKUP: dict[str, TokenType] = { item.lexeme: item for item in JSON_KEYWORD_TOKEN_TYPES }
+
+# The kinds of token that can start with a given char. tokenize() looks up the kind of the current char instead of
+# testing the char against each kind in turn.
+_CHAR_ILLEGAL = 0
+_CHAR_BLANK   = 1  # whitespace
+_CHAR_LEXEME  = 2  # a one or two char lexeme, e.g. '.', '..', '==', '&&'
+_CHAR_NAME    = 3  # member-name-shorthand, keyword or function name
+_CHAR_STRING  = 4  # string literal
+_CHAR_NUMBER  = 5  # slice selector or numeric literal
+
+
+def _ascii_char_kinds() -> dict[str, int]:
+    """Return the kind of each ASCII char. When a char could start more than one kind of token, the first kind in
+    tokenize()'s order of precedence is used."""
+    char_kinds: dict[str, int] = {}
+    for code in range(128):
+        char = chr(code)
+        if char in bnf.BLANK_CHAR:
+            char_kinds[char] = _CHAR_BLANK
+        elif char in _TWO_CHAR_TOKEN_TYPE_LOOKUP or char in _SINGLE_CHAR_TOKEN_TYPE_LOOKUP:
+            char_kinds[char] = _CHAR_LEXEME
+        elif _MEMBER_NAME_SHORTHAND_RE.match(char):
+            char_kinds[char] = _CHAR_NAME
+        elif char in STRING_DELIMETER_LEXEME_SET:
+            char_kinds[char] = _CHAR_STRING
+        elif char in bnf.SLICE_CHARS or char in bnf.DIGITS or char == bnf.MINUS:
+            char_kinds[char] = _CHAR_NUMBER
+        else:
+            char_kinds[char] = _CHAR_ILLEGAL
+    return char_kinds
+
+_CHAR_KINDS: dict[str, int] = _ascii_char_kinds()
+
 
 class JPathLexer:
     """Lexer for JPath parser"""
@@ -23,11 +77,23 @@ class JPathLexer:
     def __init__(self, file_name: str, text: str) -> None:
         self.file_name: str = file_name
         self.text: str = text
-        self.unparsed_text: str = text
-        self.position: Position = Position( text, 0, 0)  # current scan position
-        self.current_char: str | None = text[0] if len(text) > 0 else None
+        self._text_length: int = len(text)
+        # index in text of the current scan position. The patterns match text at this index, so the unparsed text is
+        # never copied
+        self._pos: int = 0
+        self.current_char: str | None = text[0] if self._text_length > 0 else None
         self.tokens: list[Token] = []
     
+    @property
+    def position(self) -> Position:
+        """The current scan position, as an empty range in text"""
+        return Position(self.text, self._pos, self._pos)
+    
+    @property
+    def unparsed_text(self) -> str:
+        """The remainder of text that has not been scanned yet"""
+        return self.text[self._pos:]
+    
     def advance(self, length_specifier: Token | TokenType | int) -> None:
         """Advance the position in the scanned text by the length of the `length_specifier` argument.
         """
@@ -35,15 +101,19 @@ class JPathLexer:
         if isinstance(length_specifier, Token):
             length = length_specifier.length
         elif isinstance(length_specifier, TokenType):
-            length = len(length_specifier.lexeme)
+            length = length_specifier.lexeme_len
         elif isinstance(length_specifier, int):
             length = length_specifier
         else:
             raise ValueError(f"Invalid token type: {type(length_specifier).__name__}")
-            
-        self.position.advance(length)
-        self.unparsed_text = self.unparsed_text[length:]  # consume this token from the input stream
-        self.current_char = self.unparsed_text[0] if len(self.unparsed_text) > 0 else None
+        self._advance_by(length)
+    
+    def _advance_by(self, length: int) -> None:
+        """Advance the position in the scanned text by `length` chars. The lexer's own calls use this method, as they
+        always know the length, instead of advance(), which first has to find out what kind of argument it was passed.
+        """
+        self._pos += length  # consume this token from the input stream
+        self.current_char = self.text[self._pos] if self._pos < self._text_length else None
     
     
     def advance_token(self,
@@ -52,22 +122,19 @@ class JPathLexer:
         """Create and save the token to token_list, and advance lexer position by the length of the token."""
         token = self.make_token(token_type, value)
         self.tokens.append(token)
-        self.advance(token)
+        self._advance_by(len(value))
         return token
         
         
     def peek_next_chars(self, number_chars:int = 1) -> str | None:
         """Return, without consuming, the first `number_chars` characters in the unparsed_text.
         Calling with number_chars=1 is the same as just referencing self.current_char."""
-        endpoint = min(number_chars, len(self.unparsed_text))
-        return self.unparsed_text[0:endpoint]
+        return self.text[self._pos:self._pos + number_chars]
     
     
     def make_token(self, token_type: TokenType, value: str) -> Token:
-        start = self.position.start
-        end   = start + len(value)
-        pos = Position(self.text, start, end)
-        return Token(token_type, pos,  value)
+        start = self._pos
+        return Token(token_type, None, value, self.text, start, start + len(value))
     
     
     def match_string_literal(self) -> tuple[bool, Error | None]:
@@ -75,34 +142,26 @@ class JPathLexer:
         the string literal, if any.
         """
         opening_quote = self.current_char
-        start_pos = self.position.start
-        string: str = ''
+        start_pos = self._pos
         if self.current_char == bnf.SINGLE_QUOTE:
-            self.advance(TokenType.SQUOTE)  # we don't create tokens for the quotes, they're part of the string literal
-            match = re.match(bnf.STRING_LITERAL_SINGLE_QUOTEABLE, self.unparsed_text)
+            self._advance_by(1)  # we don't create tokens for the quotes, they're part of the string literal
+            match = _STRING_SQ_RE.match(self.text, self._pos)
             if match:
-                string = match.group("string_sq")
-                #print(f"matched string={string}")
-                #self.advance_token(TokenType.STRING, string)
-                self.advance(len(string))
+                self._advance_by(match.end() - self._pos)  # past the string's content
         elif self.current_char == bnf.DOUBLE_QUOTE:
-            self.advance(TokenType.DQUOTE)
-            match = re.match(bnf.STRING_LITERAL_DOUBLE_QUOTEABLE, self.unparsed_text)
+            self._advance_by(1)
+            match = _STRING_DQ_RE.match(self.text, self._pos)
             if match:
-                string = match.group("string_dq")
-                self.advance(len(string))
+                self._advance_by(match.end() - self._pos)
         else:
             return False, None
 
         # if no closing quote, return unterminated string literal error
         if self.current_char in STRING_DELIMETER_LEXEME_SET:
-            value:str = self.current_char + string + self.current_char
-            self.advance(1)  # if no quote or quote mismatch, there won't be another quote here. Since there is, we can advance
-            end_pos = self.position.end
-            string_pos = Position(self.position.text, start_pos, end_pos)
-            string_token: Token = self.make_token(TokenType.STRING, value)
-            string_token.position = string_pos
-            self.tokens.append(string_token)  # we already advanced this string above
+            self._advance_by(1)  # if no quote or quote mismatch, there won't be another quote here. Since there is, we can advance
+            # the token's value is the literal with its quotes, i.e. the text we just scanned
+            value: str = self.text[start_pos:self._pos]
+            self.tokens.append(Token(TokenType.STRING, None, value, self.text, start_pos, self._pos))
         else:
             if opening_quote == bnf.DOUBLE_QUOTE:
                 details = "expected '\"'"
@@ -115,36 +174,31 @@ class JPathLexer:
         
     
     def match_member_name_shorthand(self) -> bool:
-        match = re.match(bnf.MEMBER_NAME_SHORTHAND, self.unparsed_text)
+        match = _MEMBER_NAME_SHORTHAND_RE.match(self.text, self._pos)
         if not match: return False
         
         string = match.group(0)
-        if string in JSON_KEYWORD_LEXEMES_SET:
-            # potentially a keyword. Parser can decide if it's a keyword or identifier in context
-            token_type = TOKEN_LOOKUP_DICT[string]
-            self.advance_token(token_type, string)
-        else:
-            self.advance_token(TokenType.IDENTIFIER, string)
+        # potentially a keyword. Parser can decide if it's a keyword or identifier in context
+        self.advance_token(_KEYWORD_TOKEN_TYPE_LOOKUP.get(string, TokenType.IDENTIFIER), string)
         return True
     
     def match_slice_selector(self) -> bool:
-        match = re.match(bnf.SLICE_SELECTOR, self.unparsed_text)
+        match = _SLICE_SELECTOR_RE.match(self.text, self._pos)
         if not match: return False
         self.advance_token(TokenType.SLICE, match.group(0))
         return True
 
-    INT_RE:    re.Pattern[str] = re.compile(bnf.INT)
-    NUMBER_RE: re.Pattern[str] = re.compile(bnf.NUMBER)
-    
     def match_number(self) -> bool:
         num_str: str
         
-        match = re.match(bnf.NUMBER, self.unparsed_text)
+        match = _NUMBER_RE.match(self.text, self._pos)
         if match is not None:
             num_str = match.group(0)
-            token_type = TokenType.FLOAT
-            if JPathLexer.INT_RE.fullmatch(num_str) is not None:
-                token_type = TokenType.INT
+            # decide from the groups NUMBER already matched instead of running INT over num_str. The grammar's INT
+            # excludes -0, so it's a FLOAT like the numbers with a fraction or exponent
+            token_type = TokenType.INT
+            if match.group("frac_part") or match.group("exp_part") or match.group("int_part") == "-0":
+                token_type = TokenType.FLOAT
             self.advance_token(token_type, num_str)
             return True
         
@@ -158,14 +212,14 @@ class JPathLexer:
         This implementation will now treat -0 as an int, which will fail to parse and result in a lexer error. """
         num_str: str
         
-        match = re.match(bnf.NUMBER, self.unparsed_text)
+        match = _NUMBER_RE.match(self.text, self._pos)
         if match is not None:
             num_str = match.group(0)
             if match.group("frac_part") is not None or match.group("exp_part") is not None:
                 self.advance_token(TokenType.FLOAT, num_str)
                 return True
             
-        match = re.match(bnf.INT, self.unparsed_text)
+        match = _INT_RE.match(self.text, self._pos)
         if match is not None:
             num_str = match.group(0)
             self.advance_token(TokenType.INT, num_str)
@@ -184,49 +238,60 @@ class JPathLexer:
         4. Check for literals (numbers, strings) based on their starting characters
         5. When several options are possible, look for the largest pattern first
         """
+        text = self.text
+        text_length = self._text_length
+        char_kinds = _CHAR_KINDS
+        two_char_lookup = _TWO_CHAR_TOKEN_TYPE_LOOKUP
+        single_char_lookup = _SINGLE_CHAR_TOKEN_TYPE_LOOKUP
         while self.current_char is not None:
             match: re.Match[str] | None
-            token_type:TokenType
-            if self.current_char in bnf.BLANK_CHAR:  #  whitespace
-                match = re.match(bnf.SPACES, self.unparsed_text)
-                spaces = match.group(0)  # type: ignore
-                token = self.make_token(TokenType.SPACE, spaces)
-                #self.tokens.append(token)  # commentted out to consume all whitespace
-                self.advance(token)  # advance without creating a token, i.e. eat the whitespace
-                
-            # multiple char tokens first. Need to peek at next character
-            elif self.peek_next_chars(2) in TWO_CHAR_LEXEMES_SET:
-                first_two_chars: str = cast(str, self.peek_next_chars(2))  # can't be None here because of elif above
-                token_type = TOKEN_LOOKUP_DICT[ first_two_chars ]
-                self.advance_token(token_type, token_type.lexeme)
+            token_type: TokenType | None
+            char = self.current_char
+            # the first char decides which kind of token can start here. A char past ASCII can only start a name
+            kind = char_kinds.get(char, _CHAR_NAME)
+            matched = True
+            if kind == _CHAR_BLANK:  #  whitespace
+                match = _SPACES_RE.match(text, self._pos)
+                self._advance_by(match.end() - self._pos)  # type: ignore  # eat the whitespace without creating a token
                 
-            elif self.current_char in SINGLE_CHAR_LEXEMES_SET:
-                token_type = TOKEN_LOOKUP_DICT[self.current_char]
-                self.advance_token(token_type, token_type.lexeme)
+            elif kind == _CHAR_LEXEME:
+                # multiple char tokens first. Need to peek at next character
+                token_type = None
+                second_chars = two_char_lookup.get(char)
+                if second_chars is not None and self._pos + 1 < text_length:
+                    token_type = second_chars.get(text[self._pos + 1])
+                if token_type is not None:
+                    self.advance_token(token_type, token_type.lexeme)
+                else:
+                    token_type = single_char_lookup.get(char)
+                    if token_type is not None:
+                        # the lexeme is the char itself, so there's nothing to measure
+                        pos = self._pos
+                        self.tokens.append(Token(token_type, None, char, text, pos, pos + 1))
+                        self._advance_by(1)
+                    else:
+                        matched = False
                 
             # Identifiers and keywords also handled here (member-name-shorthand, true, false, null, function names)
             #-----------------------------------------------------------------------------------------
-            elif self.match_member_name_shorthand():
-                continue  # match_member_name_shorthand() handled this
+            elif kind == _CHAR_NAME:
+                matched = self.match_member_name_shorthand()
                 
             # String literals
-            elif self.current_char in STRING_DELIMETER_LEXEME_SET:
+            elif kind == _CHAR_STRING:
                 matched, error = self.match_string_literal()
                 if error is not None:
                     return self.tokens, error
                 
-            # slice selector
-            elif self.current_char in bnf.SLICE_CHARS and self.match_slice_selector():
-                # matched a slice selector
-                continue
-                
-            # Numeric literal
-            elif ( self.current_char in bnf.DIGITS or self.current_char == bnf.MINUS ) and self.match_number():
-                continue  # match_number() handled the parsing of the number
+            # slice selector, or numeric literal
+            elif kind == _CHAR_NUMBER:
+                matched = self.match_slice_selector() or self.match_number()
                 
             else:
-                char = self.current_char
-                position = Position(self.text, self.position.start, self.position.end + 1)
+                matched = False
+            
+            if not matched:
+                position = Position(self.text, self._pos, self._pos + 1)
                 self.advance_token(TokenType.UNKNOWN, char)
                 return self.tokens, IllegalCharError(position, f"'{char}'")
 
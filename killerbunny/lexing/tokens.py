@@ -124,56 +124,42 @@ class TokenType(Enum):
     EOF     = ("EOF",     TokenCategory.EOF, )
 
     def __init__(self, lexeme: str, category: TokenCategory, precedence: int = 0, alternate_repr: str = '') -> None:
-        self._lexeme: str = lexeme
-        self._category: TokenCategory  = category
-        self._precedence = precedence
-        self._alternate_repr = alternate_repr
+        # plain attributes rather than read-only properties: the lexer and parser read these for nearly every token
+        self.lexeme: str = lexeme
+        self.lexeme_len: int = len(lexeme)  # lexemes are immutable, so compute the length once
+        self.category: TokenCategory  = category
+        self.precedence: int = precedence
+        self.alternate_repr: str = alternate_repr
     
     def __repr__(self) -> str:
-        string = (f"{self.name}(lexeme={self._lexeme}, category={self._category.name}, "
-                  f"precedence={self._precedence}, string_repr={self._alternate_repr})")
+        string = (f"{self.name}(lexeme={self.lexeme}, category={self.category.name}, "
+                  f"precedence={self.precedence}, string_repr={self.alternate_repr})")
         return string
     
     def __str__(self) -> str:
-        if self._alternate_repr :
-            return f"{self._alternate_repr}"
+        if self.alternate_repr :
+            return f"{self.alternate_repr}"
         else:
-            return f"{self._lexeme}"
+            return f"{self.lexeme}"
     
     
-    @property
-    def lexeme(self) -> str:
-        return self._lexeme
-    
-    @property
-    def category(self) -> TokenCategory:
-        return self._category
-    
-    @property
-    def precedence(self) -> int:
-        return self._precedence
-    
-    @property
-    def alternate_repr(self) -> str:
-        return self._alternate_repr
-
     def is_literal(self) -> bool:
-        return self._category == TokenCategory.LITERAL
+        return self.category == TokenCategory.LITERAL
     
     def is_keyword(self) -> bool:
-        return self._category == TokenCategory.KEYWORD
+        return self.category == TokenCategory.KEYWORD
     
     def is_comparison_operator(self) -> bool:
-        return self._category == TokenCategory.COMPARISON_OPERATOR
+        return self.category == TokenCategory.COMPARISON_OPERATOR
     
     def is_logical_operator(self) -> bool:
-        return self._category == TokenCategory.LOGICAL_OPERATOR
+        return self.category == TokenCategory.LOGICAL_OPERATOR
     
     def is_delimiter(self) -> bool:
-        return self._category == TokenCategory.DELIMITER
+        return self.category == TokenCategory.DELIMITER
     
     def is_identifier(self) -> bool:
-        return self._category == TokenCategory.IDENTIFIER
+        return self.category == TokenCategory.IDENTIFIER
 
 
 ####################################################################
@@ -259,27 +245,35 @@ SINGULAR_QUERY_FIRST_SET = { TokenType.AT, TokenType.DOLLAR }
 
 class  Token:
     
+    __slots__ = ("_token_type", "_position", "_value", "_text", "_start", "_end")
     NO_TOKEN: 'Token'
     def __init__(self,
                  token_type: TokenType,
-                 position: Position,
+                 position: Position | None,
                  value: str,
+                 text: str = '',
+                 start: int = 0,
+                 end: int = 0,
                  )-> None:
-        
+        """When `position` is None, the Position is built from `text`, `start`, and `end` the first time it's accessed.
+        The lexer creates its tokens this way, as most tokens never have their position looked at. """
         self._token_type = token_type
         self._position = position
         self._value: str = value
+        self._text  = text
+        self._start = start
+        self._end   = end
         
         
     def copy(self) -> 'Token':
         """Return a copy of this token instance. Position is copied as well. """
-        token = Token(self._token_type, self._position.copy(), self._value)
+        token = Token(self._token_type, self.position.copy(), self._value)
         return token
     
     def __repr__(self) -> str:
         #if self.value: return f"[{self.token_type}:{self.value}]"
         #return f"{self.token_type.name}"
-        return f"Token(token_type={repr(self.token_type)}, value={repr(self._value)}, position={repr(self._position)})"
+        return f"Token(token_type={repr(self.token_type)}, value={repr(self._value)}, position={repr(self.position)})"
     
     def __str__(self) -> str:
         return f"{self.token_type.name}: {self._value}"
@@ -292,8 +286,8 @@ class  Token:
             string = f"{self.token_type}:{self.value}"
         elif self.token_type.is_keyword():
             string =f"{self.token_type.category.name}:{self.value}"
-        elif self.token_type._alternate_repr:
-            string = f"{self.token_type._alternate_repr}"
+        elif self.token_type.alternate_repr:
+            string = f"{self.token_type.alternate_repr}"
         else:
             string = f"{self.token_type.name}"
         return string
@@ -312,6 +306,8 @@ class  Token:
         
     @property
     def position(self) -> Position:
+        if self._position is None:
+            self._position = Position(self._text, self._start, self._end)
         return self._position
 
     @position.setter
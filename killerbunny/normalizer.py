@@ -8,25 +8,39 @@
 
 """Methods dealing with normalizing JPath expressions."""
 
+import functools
 import json
 import os
 import re
-from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import cast, Callable
+from typing import cast, Any, Callable, Iterable, Iterator, Sequence
 
 from common.screen_utils import display_list_elements
 from killerbunny.shared.json_type_defs import JSON_ValueType, JSON_PRIMITIVE_TYPES, JSON_ARRAY_TYPES, \
-    JSON_OBJECT_TYPES
+    JSON_OBJECT_TYPES, JSON_PrimitiveType, JSON_ArrayType, JSON_ObjectType
 from killerbunny.lexing.lexer import JPathLexer
 from killerbunny.incubator.jsonpointer.constants import SCALAR_TYPES, PATH_VALUE_SEPARATOR, ONE_MEBIBYTE, JPATH_VALUES_SUFFIX
 from killerbunny.shared.jpath_bnf import JPathBNFConstants
 from killerbunny.incubator.jsonpointer.pretty_printer import FormatFlags, format_scalar, pretty_print
 
+# patterns compiled once at import instead of on every call
+# a name selector that can be written in member-name-shorthand notation, e.g. ['store'] -> .store
+_NAME_SHORTHAND_RE: re.Pattern[str] = re.compile(fr"\[['\"]({JPathBNFConstants.MEMBER_NAME_SHORTHAND})['\"]]")
+# the name or index in each segment of a normalized path, e.g. 'store' and '0' in $['store'][0]
+_SEGMENT_PARTS_RE:  re.Pattern[str] = re.compile(r"\['?([0-9]+|[\w\s]+?)'?\]")
 
+# The kind of node a value of each exact JSON type is labeled as, found with one dict lookup on type(value). Values of
+# any other type, e.g. a subclass or a tuple, are classified with isinstance() as before.
+_SCALAR_NODE = 0
+_ARRAY_NODE  = 1
+_OBJECT_NODE = 2
+_JSON_NODE_KINDS: dict[type, int] = {
+    **{ scalar_type: _SCALAR_NODE for scalar_type in SCALAR_TYPES }, list: _ARRAY_NODE, dict: _OBJECT_NODE
+}
 
-@dataclass
+
+@dataclass(slots=True)
 class PathValueNode:
     path: str
     value: JSON_ValueType
@@ -41,38 +55,56 @@ def label_all_nodes_normal_form_breadth_first(
                                         ) -> list[str]:
     """Similer to label_all_nodes_normal_form, but breadth-first traversal.
     Breadth-first
-     start: put root element in queue.
+     start: the root element is the only node of the first level.
      - each iteration
-    1. pull next element from top of queue and process it.
-    2. add all child elements of current element to end queue.
+    1. process each node of the current level, in order.
+    2. add all child elements of each node to the next level.
     
     """
-
-        
-    deq:deque[PathValueNode] = deque()
-    deq.append(PathValueNode(JPathBNFConstants.ROOT_IDENTIFIER, json_value))
+    # (path, value) tuples for the nodes of the current level. Two plain lists swapped per level give the same order as
+    # a FIFO queue of all the nodes, without the deque's popleft() per node
+    level_nodes: list[tuple[str, JSON_ValueType]] = [ (JPathBNFConstants.ROOT_IDENTIFIER, json_value) ]
     
-    current_node: PathValueNode
-    while len(deq) > 0:
-        current_node = deq.popleft()
-        value = current_node.value
-        path = current_node.path
-        if isinstance(value, JSON_PRIMITIVE_TYPES):
-            # these are terminals, so add path and  value. No children
-            element_list.append(
-                f'{path}{PATH_VALUE_SEPARATOR}{format_scalar(value, format_)}\n')
-        elif isinstance(value, JSON_ARRAY_TYPES):
-            element_list.append(f'{path}{PATH_VALUE_SEPARATOR}{pretty_print(value, format_, [])}\n')
-            # push children on the deque
-            for i, item in enumerate(value):
-                deq.append( PathValueNode(f"{path}[{i}]", item) )
-        elif isinstance(value, JSON_OBJECT_TYPES):
-            element_list.append(
-                f'{path}{PATH_VALUE_SEPARATOR}{pretty_print(value, format_, [])}\n')
-            for k, v in value.items():
-                deq.append( PathValueNode(f"{path}['{k}']", v) )
-        else:
-            raise ValueError(f"Unexpected type: {type(current_node)}")
+    # bind the names used for every node to locals
+    append = element_list.append
+    node_kinds = _JSON_NODE_KINDS
+    separator = PATH_VALUE_SEPARATOR
+    # every empty list, and every empty dict, prints the same, so print them once instead of once per empty node
+    empty_list_str = pretty_print([], format_, [])
+    empty_dict_str = pretty_print({}, format_, [])
+    while level_nodes:
+        next_level_nodes: list[tuple[str, JSON_ValueType]] = []
+        push = next_level_nodes.append
+        for path, value in level_nodes:
+            kind = node_kinds.get(type(value))
+            if kind is None:
+                if isinstance(value, JSON_PRIMITIVE_TYPES):
+                    kind = _SCALAR_NODE
+                elif isinstance(value, JSON_ARRAY_TYPES):
+                    kind = _ARRAY_NODE
+                elif isinstance(value, JSON_OBJECT_TYPES):
+                    kind = _OBJECT_NODE
+                else:
+                    raise ValueError(f"Unexpected type: {type(value)}")
+            if kind == _SCALAR_NODE:
+                # these are terminals, so add path and  value. No children
+                append(f'{path}{separator}{format_scalar(cast(JSON_PrimitiveType, value), format_)}\n')
+            elif kind == _ARRAY_NODE:
+                json_array = cast(JSON_ArrayType, value)
+                value_str = (empty_list_str if not json_array and type(json_array) is list
+                             else pretty_print(json_array, format_, []))
+                append(f'{path}{separator}{value_str}\n')
+                # add children to the next level
+                for i, item in enumerate(json_array):
+                    push( (f"{path}[{i}]", item) )
+            else:
+                json_object = cast(JSON_ObjectType, value)
+                value_str = (empty_dict_str if not json_object and type(json_object) is dict
+                             else pretty_print(json_object, format_, []))
+                append(f'{path}{separator}{value_str}\n')
+                for k, v in json_object.items():
+                    push( (f"{path}['{k}']", v) )
+        level_nodes = next_level_nodes
     
     return element_list
 
@@ -83,27 +115,49 @@ def label_all_nodes_normal_form_depth_first(json_value: JSON_ValueType,
                                             root_path: str = "",
                                             level: int = 0,
                                             ) -> list[str]:
-    """Recursive depth-first traversal of json value in argument, create a normalized JSON Path path for each element and return all paths
+    """Depth-first traversal of json value in argument, create a normalized JSON Path path for each element and return all paths
     as  str : str pairs, separated by _SEPARATOR..
     Left str is the normalized JSON Path, right str is the serialzed JSON value to which that path refers.
     """
-    if isinstance(json_value, SCALAR_TYPES):
-        # these are terminals, so add path and  value
-        element_list.append(
-            f'{root_path}{PATH_VALUE_SEPARATOR}{format_scalar(json_value, format_)}\n')
-    elif isinstance(json_value, list):
-        path = JPathBNFConstants.ROOT_IDENTIFIER if not root_path and level == 0 else root_path
-        # path = root_path
-        element_list.append(f'{path}{PATH_VALUE_SEPARATOR}{pretty_print(json_value, format_, [])}\n')
-        path = root_path
-        for i, item in enumerate(json_value):
-            label_all_nodes_normal_form_depth_first(item, element_list, format_, f"{path}[{i}]", level + 1)
-    elif isinstance(json_value, dict):
-        path = root_path if root_path else JPathBNFConstants.ROOT_IDENTIFIER
-        element_list.append(
-            f'{path}{PATH_VALUE_SEPARATOR}{pretty_print(json_value, format_, [])}\n')
-        for key, value in json_value.items():
-            label_all_nodes_normal_form_depth_first(value, element_list, format_, f"{path}['{key}']", level + 1)
+    # An explicit stack instead of recursion, so deeply nested values can't exceed the recursion limit. Children are
+    # pushed in reverse so they're popped, and labeled, in their original order.
+    stack: list[tuple[str, JSON_ValueType, int]] = [ (root_path, json_value, level) ]
+    push = stack.append
+    append = element_list.append
+    node_kinds = _JSON_NODE_KINDS
+    # every empty list, and every empty dict, prints the same, so print them once instead of once per empty node
+    empty_list_str = pretty_print([], format_, [])
+    empty_dict_str = pretty_print({}, format_, [])
+    while stack:
+        root_path, json_value, level = stack.pop()
+        kind = node_kinds.get(type(json_value))
+        if kind is None:
+            if isinstance(json_value, SCALAR_TYPES):
+                kind = _SCALAR_NODE
+            elif isinstance(json_value, list):
+                kind = _ARRAY_NODE
+            elif isinstance(json_value, dict):
+                kind = _OBJECT_NODE
+        if kind == _SCALAR_NODE:
+            # these are terminals, so add path and  value
+            append(f'{root_path}{PATH_VALUE_SEPARATOR}{format_scalar(cast(JSON_PrimitiveType, json_value), format_)}\n')
+        elif kind == _ARRAY_NODE:
+            json_list = cast(list[Any], json_value)
+            path = JPathBNFConstants.ROOT_IDENTIFIER if not root_path and level == 0 else root_path
+            value_str = (empty_list_str if not json_list and type(json_list) is list
+                         else pretty_print(json_list, format_, []))
+            append(f'{path}{PATH_VALUE_SEPARATOR}{value_str}\n')
+            path = root_path
+            for i in range(len(json_list) - 1, -1, -1):
+                push( (f"{path}[{i}]", json_list[i], level + 1) )
+        elif kind == _OBJECT_NODE:
+            json_dict = cast(dict[Any, Any], json_value)
+            path = root_path if root_path else JPathBNFConstants.ROOT_IDENTIFIER
+            value_str = (empty_dict_str if not json_dict and type(json_dict) is dict
+                         else pretty_print(json_dict, format_, []))
+            append(f'{path}{PATH_VALUE_SEPARATOR}{value_str}\n')
+            for key, value in reversed(json_dict.items()):
+                push( (f"{path}['{key}']", value, level + 1) )
  
     return element_list
 
@@ -120,44 +174,64 @@ def add_shorthand_notation(lines: list[str]) -> list[str]:
     Not all name selectors (["foo"]) can be converted to shorthand notation. Only those that match the regex pattern
     JPathBNFConstants.NAME_SELECTOR_PATTERN will be converted
     """
-    grammar = JPathBNFConstants()
-    result: list[str] = []
-    name_re = re.compile(fr"\[['\"]({grammar.MEMBER_NAME_SHORTHAND})['\"]]")
+    return list(_shorthand_versions(lines))
+
+def _shorthand_versions(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the lines of add_shorthand_notation()'s result, one at a time"""
+    name_re = _NAME_SHORTHAND_RE
+    last_line = ''
     for index, line in enumerate(lines):
         line = line.split(PATH_VALUE_SEPARATOR)[0].rstrip()  # discard the json value part
-        result.append(line)
-        line_subs:str = line
-        matches = name_re.findall(line)
-        for match in matches:
-            search_str = f"['{match}']"
-            result.append(f"{line.replace(search_str, f'.{match}')}")
-            line_subs = line_subs.replace(search_str, f'.{match}')
-        if index > 0 and line_subs != result[-1]:  # avoid duplicate substitutions
-            result.append(line_subs)  # full substitution of all name selectors
-    return result
+        yield line
+        last_line = line
+        for name in name_re.findall(line):
+            # every ['name'] selector for this name is converted
+            last_line = line.replace(f"['{name}']", f".{name}")
+            yield last_line
+        if index > 0:
+            line_subs: str = name_re.sub(_shorthand_name, line)  # full substitution of all name selectors
+            if line_subs != last_line:  # avoid duplicate substitutions
+                yield line_subs
+
+def _shorthand_name(match: re.Match[str]) -> str:
+    """re.sub() replacement for a _NAME_SHORTHAND_RE match: ['name'] -> .name. Only single quoted name selectors are
+    converted, a name selector in double quotes is returned unchanged."""
+    selector = match.group(0)
+    if selector[1] == "'" and selector[-2] == "'":
+        return f".{match.group(1)}"
+    return selector
 
 def add_double_quoted_versions(lines: list[str]) -> list[str]:
     """ For every line in the input, add a duplicate line with all the single quotes reqplaced by double quotes
     This method is naive and will not work for quote characters in string literals. Examine using regex substitution
     if that becomes a problem.
     """
-    result: list[str] = []
+    return list(_double_quoted_versions(lines))
+
+def _double_quoted_versions(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the lines of add_double_quoted_versions()'s result, one at a time"""
     for line in lines:
-        result.append(line)
+        yield line
         new_line = line.replace("'", '"')
-        if result[-1] != new_line:
-            result.append(new_line)  # avoid duplicate substitutions
-    return result
+        if line != new_line:
+            yield new_line  # avoid duplicate substitutions
+
+def add_shorthand_and_double_quoted_versions(lines: list[str]) -> list[str]:
+    """Return add_double_quoted_versions(add_shorthand_notation(lines)), in a single pass over lines without building
+    the intermediate list."""
+    return list(_double_quoted_versions(_shorthand_versions(lines)))
+
+@functools.lru_cache(maxsize=4096)
+def _lexed_tokens(line: str) -> str:
+    """Return the pretty printed test representations of the tokens in line. Cached, so a path that recurs across calls,
+    e.g. $['store'] in the test files for several JSON files, is only lexed once."""
+    tokens = JPathLexer("",line).tokenize()[0]
+    return pretty_print([ token.__testrepr__() for token in tokens ], FormatFlags(), [], 0)
 
 def lexcercise(lines: list[str]) -> list[str]:
     """Given an input list of valid, well formed Json path identifiers, run each linethrough lexer
     to generate a token list and  append these to each line, separated by PATH_SEPARATOR. This creates a testing file."""
-    result: list[str] = []
-    for line in lines:
-        tokens = JPathLexer("",line).tokenize()[0]
-        rmap = map(lambda x: x.__testrepr__(), tokens)
-        result.append(f"{line}{PATH_VALUE_SEPARATOR}{pretty_print(list(rmap),FormatFlags(), [],0)}")
-    return result
+    return [ f"{line}{PATH_VALUE_SEPARATOR}{_lexed_tokens(line)}" for line in lines ]
 
 def load_obj_from_json_file(input_file: Path) -> JSON_ValueType:
     """Return the  json object from the json file in the argument.
@@ -189,63 +263,64 @@ def generate_test_parameters(
         print(f"Created {test_file}")
     return s
 
-def subpath(paths: list[str], path_component_index:int = -1) -> str:
+def subpath(paths: Sequence[str], path_component_index:int = -1) -> str:
     """Return the subpath composed of first N reference tokens, where N == path_component_index argument.
     If path_component_index == -1. return the full path.
     """
-    subpath = "$"
-    start = 0
+    segments: list[str] = [ "$" ]  # joined once at the end, instead of growing a str one segment at a time
     end = len(paths) if path_component_index == -1 else path_component_index + 1
-    for index in range(start, end):
-        if paths[index].isdigit():
-            subpath += f"[{paths[index]}]"
-        elif paths[index] == "$":
+    for index in range(0, end):
+        path = paths[index]
+        if path.isdigit():
+            segments.append(f"[{path}]")
+        elif path == "$":
             continue
         else:
-            subpath += f"['{paths[index]}']"
-    return subpath
+            segments.append(f"['{path}']")
+    return ''.join(segments)
+
+@functools.lru_cache(maxsize=1024)
+def _segment_parts(normalized_jpath: str) -> tuple[str, ...]:
+    """Return the root identifier followed by the name or index of each segment in normalized_jpath. Cached so that
+    paths resolved repeatedly are only scanned once."""
+    return ('$', *_SEGMENT_PARTS_RE.findall(normalized_jpath))
 
 def resolve_json_path(json_value: JSON_ValueType, normalized_jpath: str) -> tuple[PathValueNode, str | None] :
     """Path must be normalized and single query result"""
     if normalized_jpath == JPathBNFConstants.ROOT_IDENTIFIER:
         return PathValueNode(JPathBNFConstants.ROOT_IDENTIFIER, json_value), None
     
-    segment_parts_re = r"\['?([0-9]+|[\w\s]+?)'?\]"
-    segment_parts = ['$'] + re.findall(segment_parts_re, normalized_jpath)
-    print(f"normalized_jpath = {normalized_jpath}")
-    print(f"results = {segment_parts}")
+    segment_parts = _segment_parts(normalized_jpath)
     
     cur_node = json_value
     last_path_index = len(segment_parts) - 1
-    for index, segment_part in enumerate(segment_parts):
-        if index == 0 and segment_part == JPathBNFConstants.ROOT_IDENTIFIER:
-            continue  # first token in list of len > 1, this is just the root identifier, so skip
-        if isinstance(cur_node, JSON_OBJECT_TYPES):
+    # segment_parts[0] is the root identifier, so start with the first segment
+    for index in range(1, last_path_index + 1):
+        segment_part = segment_parts[index]
+        # JSON values are almost always exactly a dict or list, so check the exact type before isinstance()
+        if type(cur_node) is dict or isinstance(cur_node, JSON_OBJECT_TYPES):
             if segment_part not in cur_node:
                 raise KeyError(f"Invalid dict key: '{segment_part}' in path '{subpath(segment_parts, index)}'")
             cur_node = cur_node[segment_part]
-        elif isinstance(cur_node, JSON_ARRAY_TYPES):
+        elif type(cur_node) is list or isinstance(cur_node, JSON_ARRAY_TYPES):
             list_length = len(cur_node)
             try:
                 i = int(segment_part)
-                if  i >= list_length or i < 0:
-                    raise IndexError(f"Invalid list index {i} in path "
-                                     f"'{subpath(segment_parts,index)}' for list of length {list_length}")
-                cur_node = cur_node[int(segment_part)]
             except ValueError:
                 # raise ... from None prevents chaining the ValueError from the int(unsec_path), which we are handling here
                 raise ValueError(f"Invalid list index type:{type(segment_part).__name__} in path "
                                  f"'{subpath(segment_parts,index)}'") from None
+            if  i >= list_length or i < 0:
+                raise IndexError(f"Invalid list index {i} in path "
+                                 f"'{subpath(segment_parts,index)}' for list of length {list_length}")
+            cur_node = cur_node[i]
         elif isinstance(cur_node, SCALAR_TYPES):
-            # terminal node, should align with end of path
-            # todo error handling if more path components left to process
-            if index != last_path_index:
-                raise ValueError(f"Invalid path reference '{subpath(segment_parts,index+1)}', last good value: '{cur_node}' for path '{subpath(segment_parts,index)}'")
+            pass  # terminal node, only the root value can be one here. The check below handles any segments left
         else:
             raise TypeError(f"Encountered non JSON type: {type(cur_node)}")
         
-        if isinstance(cur_node, SCALAR_TYPES) and index != last_path_index:
-            #print(f"*********** TERMINAL NODE REACHED, BUT PATH CONTINUES *****")
+        # terminal node reached with segments left to resolve
+        if index != last_path_index and isinstance(cur_node, SCALAR_TYPES):
             raise ValueError(f"Invalid path reference '{subpath(segment_parts,index+1)}', last good value: '{cur_node}' "
                              f"for path '{subpath(segment_parts,index)}'")
         
@@ -291,10 +366,7 @@ def t_2() -> None:
     
     json_value = load_obj_from_json_file(file1)
     lines = label_all_nodes_normal_form_depth_first(json_value, [], FormatFlags().as_json_format().with_single_line(True), "", 0)
-    lines = add_shorthand_notation(lines)
-    display_list_elements(lines,single_line=False, quote=False)
-    lines = add_double_quoted_versions(lines)
-    print()
+    lines = add_shorthand_and_double_quoted_versions(lines)
     lines = lexcercise(lines)
     display_list_elements(lines,single_line=False, quote=False)
 
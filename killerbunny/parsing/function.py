@@ -5,11 +5,13 @@
 #  Created by: Robert L. Ross
 #
 #
+import functools
 import inspect
 import re
 import threading
 from abc import abstractmethod
 from enum import Enum
+from types import MappingProxyType
 from typing import (TypeAlias, Union, Any, Self, cast, get_type_hints, get_origin, get_args)
 from typing import override  # type: ignore
 
@@ -119,6 +121,18 @@ class FunctionParamType(Enum):
         
         return "NodesType"
 
+def _read_eval_signature(func_class: type) -> tuple[int, MappingProxyType[str, Any], Any]:
+    """Return the parameter count (excluding `self`), the parameter type hints and the return type hint of
+    func_class.eval()."""
+    param_count = len(inspect.signature(func_class.eval).parameters) - 1  # type: ignore[attr-defined]
+    type_hints = get_type_hints(func_class.eval)  # type: ignore[attr-defined]
+    param_types = {
+        name: hint for name, hint in type_hints.items()
+        if name != 'return' and name != 'self'
+    }
+    return param_count, MappingProxyType(param_types), type_hints.get('return', Any)
+
+
 class FunctionNode(ASTNode):
     """Base class for functions defined per section 2.4 Function Extensions, page 34, RFC 9535.
      
@@ -126,6 +140,19 @@ class FunctionNode(ASTNode):
      It is distinct from a FunctionCallNode, which represents an invocation of a function, with actual argument
      values for each function parameter.
      """
+    # python types of the eval() signature, set once per concrete subclass by __init_subclass__()
+    _eval_param_count:  int
+    _eval_param_types:  MappingProxyType[str, Any]
+    _eval_return_type:  Any
+    
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Materialize the eval() signature of each concrete subclass when it's defined, so constructing an instance
+        does no introspection. The eval() type hints must therefore be resolvable when the subclass is defined."""
+        super().__init_subclass__(**kwargs)
+        if getattr(cls.eval, '__isabstractmethod__', False):
+            return
+        cls._eval_param_count, cls._eval_param_types, cls._eval_return_type = _read_eval_signature(cls)
+    
     def __init__(self, func_name: str, func_type: 'FunctionParam', param_list: list['FunctionParam']) -> None:
         if not isinstance(param_list, list) :
             raise TypeError(f"Expected param_list to be list[FunctionParam], but got {type(param_list)}")
@@ -169,24 +196,9 @@ class FunctionNode(ASTNode):
     
     def get_eval_type_hints(self):
         """Get the type hints of the eval method for this function node instance."""
-        # Get the actual implementation of the eval method from the subclass
-        eval_method = self.__class__.eval
-        
-        # Get the type annotations
-        type_hints = get_type_hints(eval_method)
-        
-        # Extract parameter types (excluding 'self' and 'return')
-        param_types = {
-            name: hint for name, hint in type_hints.items()
-            if name != 'return' and name != 'self'
-        }
-        
-        # Get the return type
-        return_type = type_hints.get('return', Any)
-        
         return {
-            'param_types': param_types,
-            'return_type': return_type
+            'param_types': dict(self._eval_param_types),
+            'return_type': self._eval_return_type
         }
     
     def _types_compatible(self, annotation_type, expected_type):
@@ -214,16 +226,9 @@ class FunctionNode(ASTNode):
 
     def set_python_params(self) -> None:
         """Use the eval() signature to set the expected python arg types."""
-        # Get the eval method of the subclass
-        eval_method = self.__class__.eval
-        
-        # Get the signature of the method
-        sig = inspect.signature(eval_method)
-        parameters = list(sig.parameters.values())
-        
         # Get expected parameter count from the function's parameter list
         expected_param_count = len(self._param_list)
-        actual_param_count = len(parameters) - 1  # exclude `self`
+        actual_param_count = self._eval_param_count
         
         if actual_param_count != expected_param_count:
             raise ValueError(
@@ -232,8 +237,7 @@ class FunctionNode(ASTNode):
             )
         
         # Check if the parameter types match the declared FunctionParam types
-        type_hints = self.get_eval_type_hints()
-        param_types = type_hints['param_types']
+        param_types, return_type = self._eval_param_types, self._eval_return_type
         
         for i, (param_name, param_type) in enumerate(param_types.items()):
             # Get the expected type from the corresponding FunctionParam
@@ -244,7 +248,6 @@ class FunctionNode(ASTNode):
                 # Check if the types are compatible?
         
         # Check return type compatibility
-        return_type = type_hints['return_type']
         self._func_type._python_type = return_type
         expected_return_type = self._func_type.python_type
         if not self._types_compatible(return_type, expected_return_type):
@@ -543,6 +546,14 @@ class CountFunction(FunctionNode):
             raise TypeError(f"`nodes` argument must be NodesType, but got {type(nodes)}")
         return len(nodes)
     
+
+@functools.lru_cache(maxsize=256)
+def _compile_regex(regex_str: str) -> re.Pattern[str]:
+    """Return the compiled regex_str. Filter selectors call match() and search() once per candidate node, usually
+    with the same regexp, so each one is only compiled once instead of looked up in re's cache for every node."""
+    return re.compile(regex_str)
+
+
 class RegexFuncBase(FunctionNode):
     """Base class of MatchFunction and SearchFunction, as they only differ in function name
     and regex method, either  `match` or `search`
@@ -605,7 +616,7 @@ class RegexFuncBase(FunctionNode):
             raise ValueError(f"Expected {len(self._param_list)} arguments, but got {len(args)}")
         
         re_str = str(args[1])
-        re.compile(re_str)  # will raise re.error if `re` doesn't support the regexp
+        _compile_regex(re_str)  # will raise re.error if `re` doesn't support the regexp
         
         return True
 
@@ -620,7 +631,7 @@ class MatchFunction(RegexFuncBase):
             str_val, regex_str = self._convert_args(string, iregexp_str)
         except TypeError:
             return LogicalType.value_for(False)
-        return LogicalType.value_for( re.fullmatch( regex_str, str_val) is not None )
+        return LogicalType.value_for( _compile_regex(regex_str).fullmatch(str_val) is not None )
 
 class SearchFunction(RegexFuncBase):
     """Check whether a given string contains a substring that matches a given regular expression,"""
@@ -633,7 +644,7 @@ class SearchFunction(RegexFuncBase):
             str_val, regex_str = self._convert_args(string, iregexp_str)
         except TypeError:
             return LogicalType.value_for(False)
-        return LogicalType.value_for( re.search( regex_str, str_val) is not None )
+        return LogicalType.value_for( _compile_regex(regex_str).search(str_val) is not None )
 
 
 class ValueFunction(FunctionNode):
@@ -124,7 +124,7 @@ class UnaryOpNode(SingleNodeContainer):
             raise NotImplementedError(f"Expected TokenType.NOT. UnaryOpNode does not support {op_token.token_type}")
         super().__init__(node, node_type)
         self.op_token = op_token
-        self.set_pos(op_token.position.text, op_token._position.start, node._position.end)
+        self.set_pos(op_token.position.text, op_token.position.start, node._position.end)
         
         
     def __repr__(self) -> str:
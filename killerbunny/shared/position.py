@@ -14,6 +14,7 @@ class Position:
     """
     Holds a start and end index into a str, along with the str itself.
     """
+    __slots__ = ("range_", "text", "index", "line_number", "column_number", "file_name", "file_text")
     range_: range
     text: str
     @property
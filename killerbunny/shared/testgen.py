@@ -433,9 +433,9 @@ def evaluate_jpath_str(file_name:str, jpath_query_str: str, json_value:JSON_Valu
     if rt_result.value is not None:
         # print(f"ast_node: {ast_node}, value: {rt_result.value}, type(value) = {type(rt_result.value)}")
         test_name = f"{file_name}-{jpath_query_str}"
-        values: list[JSON_ValueType] =  list(cast(VNodeList, rt_result.value).values())
+        values: list[JSON_ValueType] =  cast(VNodeList, rt_result.value).values_list()
         #values_json = json.dumps(values)
-        paths: list[str] =  [ npath.jpath_str for npath in cast(VNodeList, rt_result.value).paths() ]
+        paths: list[str] =  [ npath.jpath_str for npath in cast(VNodeList, rt_result.value).paths_list() ]
         test_case = EvaluatorTestCase(test_name, jpath_query_str, json_value, file_name, False, "", None, [values], [paths],)
         return test_case
     else:
@@ -6,7 +6,7 @@ import pytest
 
 from killerbunny.incubator.jsonpointer.constants import PATH_VALUES_SUFFIX, JSON_FILE_SUFFIX
 from killerbunny.incubator.jsonpointer.json_pointer import resolve_json_pointer, \
-    unescape_ref_token, escape_ref_token, validate
+    unescape_ref_token, escape_ref_token, validate, resolve_json_pointer_bulk
 
 from utils import find_json_test_file_stems, find_json_test_file, \
     load_obj_from_json_file, load_path_values, JSON_FILES_DIR
@@ -105,4 +105,9 @@ escape_tests = [("~1", "~01"),
 @pytest.mark.parametrize("unescaped_ref_token, expected", escape_tests)
 def test_escape(unescaped_ref_token: str, expected: str) -> None:
     actual = escape_ref_token(unescaped_ref_token)
-    assert actual == expected
\ No newline at end of file
+    assert actual == expected
+
+def test_resolve_json_pointer_bulk(json_object_fixture) -> None:
+    paths = ["/name", "/phoneNumbers/1", "/address/city", "/name"]
+    expected = [resolve_json_pointer(json_object_fixture, path) for path in paths]
+    assert resolve_json_pointer_bulk(json_object_fixture, paths) == expected
@@ -1,11 +1,14 @@
 
+import itertools
+import json
+import sys
 import unittest
 
 from killerbunny.incubator.jsonpointer.constants import JSON_VALUES
 # noinspection PyProtectedMember
 from killerbunny.incubator.jsonpointer.pretty_printer import FormatFlags, format_scalar, _spacer, \
     _is_empty_or_single_item, _pp_list, \
-    _pp_dict, pretty_print
+    _pp_dict, pretty_print, _specialized_formatters, _line_breaks
 
 # unittest uses (expected, actual) in asserts whereas pytest uses (actual, expected) to my eternal confusion
 
@@ -77,6 +80,22 @@ class TestPPScalar(unittest.TestCase):
         self.assertEqual(format_scalar("hello", FormatFlags().with_use_repr(True).with_quote_strings(True)), '"hello"')
         self.assertEqual(format_scalar("k\"l", FormatFlags().with_use_repr(True).with_quote_strings(True)), '"k\\"l"')
 
+    def test_string_json_escapes(self) -> None:
+        flags = FormatFlags.as_json_format()
+        for s in ["a\\b", "tab\there", "new\nline", "\x00\x1f", "both ' and \" quotes", "\x7f", "caf\u00e9"]:
+            self.assertEqual(s, json.loads(format_scalar(s, flags)))
+        self.assertEqual('"\\u0001\\n"', format_scalar("\x01\n", flags))
+
+    def test_specialized_formatters(self) -> None:
+        values: list[JSON_VALUES] = [None, True, False, 0, -7, 3.14, 1e20, "hello", 'k"l', "tab\there", ""]
+        for flags in itertools.product((False, True), repeat=4):
+            quote_strings, single_quotes, use_repr, format_json = flags
+            format_ = FormatFlags(quote_strings=quote_strings, single_quotes=single_quotes, use_repr=use_repr,
+                                  format_json=format_json)
+            formatters = _specialized_formatters(format_)
+            for value in values:
+                self.assertEqual(format_scalar(value, format_), formatters[type(value)](value), (format_, value))
+
     def test_number(self) -> None:
         self.assertEqual(format_scalar(123, FormatFlags()), "123")
         self.assertEqual(format_scalar(3.14, FormatFlags()), "3.14")
@@ -139,6 +158,15 @@ class TestIsEmptyOrSingleItem(unittest.TestCase):
         self.assertFalse(_is_empty_or_single_item({"key": {"subkey1": "value1", "subkey2": "value2"}}))
         self.assertFalse(_is_empty_or_single_item({"key": [[{"one": "foo", "two": "bar"}]]}))
 
+    def test_memo(self) -> None:
+        inner = [["one"]]
+        outer = {"key": inner}
+        memo: dict[int, bool] = {}
+        self.assertTrue(_is_empty_or_single_item(outer, memo))
+        self.assertEqual({id(outer): True, id(inner): True, id(inner[0]): True}, memo)
+        memo[id(inner)] = False  # cached results are used instead of walking the container again
+        self.assertFalse(_is_empty_or_single_item(inner, memo))
+
 
 # noinspection SpellCheckingInspection
 class TestPPDict(unittest.TestCase):
@@ -523,3 +551,32 @@ class TestPrettyPrint(unittest.TestCase):
     def test_nested_empty_dict_single_line(self) -> None:
         self.assertEqual(pretty_print([{}], FormatFlags().with_single_line(True)), "[ { } ]")
 
+
+    def test_deeply_nested(self) -> None:
+        # nesting deeper than the recursion limit must not raise RecursionError
+        depth = sys.getrecursionlimit() * 2
+        data: JSON_VALUES = "x"
+        for _ in range(depth):
+            data = [data, 1]
+        actual = pretty_print(data, FormatFlags().with_single_line(True))
+        self.assertEqual(actual, "[ " * depth + "x" + ", 1 ]" * depth)
+
+    def test_deep_indents_not_shared(self) -> None:
+        # indents deeper than the shared line break tuple are only added to a copy for the current call
+        format_ = FormatFlags().with_single_line(False)
+        shallow = pretty_print({"a": [1, 2]}, format_)
+        depth = 100
+        data: JSON_VALUES = "x"
+        for _ in range(depth):
+            data = [1, data]
+        lines = pretty_print(data, format_).split("\n")
+        self.assertIn(_spacer(format_, depth) + "x", lines)
+        self.assertEqual(len(_line_breaks(format_, False)), 32)
+        self.assertEqual(pretty_print({"a": [1, 2]}, format_), shallow)
+
+    def test_check_cycles_false(self) -> None:
+        # skipping cycle detection does not change the output of a tree
+        data: JSON_VALUES = {"one": [1, {"two": [2, 3]}], "three": {"four": None, "five": [[True], []]}}
+        for format_ in (FormatFlags(), FormatFlags().with_single_line(False), FormatFlags.as_json_format()):
+            with self.subTest(format_=format_):
+                self.assertEqual(pretty_print(data, format_, check_cycles=False), pretty_print(data, format_))
@@ -93,3 +93,31 @@ def test_cycle_list_in_dict(caplog: LogCaptureFixture) -> None:
     assert "Cycle detected in json_list: [1, [...]]" in record.message
 
 
+
+# noinspection SpellCheckingInspection
+def test_cycle_first_item_in_list(caplog: LogCaptureFixture) -> None:
+    parent_list: list[Any] = []
+    parent_list.append(parent_list)  # creates a cycle as the first element, printed on the same line as the bracket
+    parent_list.append(1)
+    
+    lines = [""]
+    caplog.set_level(logging.WARN)
+    actual = _pp_list(parent_list, FormatFlags(), lines)  # this should log a warning about the cycle
+    expected: list[Any] = ['[ [...],', ' 1', ' ]']
+    assert actual == expected
+    
+    assert len(caplog.records) == 1
+    assert "Cycle detected in json_list: [[...], 1]" in caplog.records[0].message
+
+# noinspection SpellCheckingInspection
+def test_shared_list_is_not_a_cycle(caplog: LogCaptureFixture) -> None:
+    shared_list: list[Any] = [ 1, 2 ]
+    dict_: dict[str, Any] = { "one" : shared_list, "two": shared_list }  # same list twice, but no cycle
+    
+    lines = [""]
+    caplog.set_level(logging.WARN)
+    actual = _pp_dict(dict_, FormatFlags(), lines)
+    expected: list[Any] = ['{', ' one:', ' [', ' 1,', ' 2', ' ],', ' two:', ' [', ' 1,', ' 2', ' ]', ' }']
+    assert actual == expected
+    
+    assert len(caplog.records) == 0
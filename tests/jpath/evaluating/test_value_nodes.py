@@ -0,0 +1,48 @@
+#  File: test_value_nodes.py
+#  Copyright (c) 2025 Robert L. Ross
+#  All rights reserved.
+#  Open-source license to come.
+#  Created by: Robert L. Ross
+#
+
+"""Tests for the evaluator's value node classes."""
+import pytest
+
+from killerbunny.evaluating.evaluator_types import NormalizedJPath
+from killerbunny.evaluating.value_nodes import NullValue, NumberValue, StringValue, VNode, VNodeList
+from killerbunny.shared.context import Context
+
+
+def test_literal_values_do_not_share_context() -> None:
+    # each literal carries its own position and context, which holds the current node and so the JSON document
+    context = Context("filter")
+    number_value = NumberValue(1).set_context(context)
+    null_value = NullValue().set_context(context)
+    assert number_value.context is context and null_value.context is context
+    assert NumberValue(1).context is None
+    assert NullValue().context is None
+    assert NullValue().value is None
+
+
+def test_values_list_and_paths_list() -> None:
+    root = {"a": 1, "b": [2, 3]}
+    node_list = VNodeList([VNode(NormalizedJPath("$['a']"), 1, root, 1),
+                           VNode(NormalizedJPath("$['b']"), [2, 3], root, 1)])
+    assert node_list.values_list() == list(node_list.values())
+    assert [p.jpath_str for p in node_list.paths_list()] == ["$['a']", "$['b']"]
+
+
+@pytest.mark.parametrize("raw_string, expected", [
+    ("'red'",       "red"),
+    ('"red"',       "red"),
+    ("''",          ""),
+    ("'a\\u0041'",  "aA"),
+])
+def test_string_value(raw_string: str, expected: str) -> None:
+    assert StringValue(raw_string).value == expected
+
+
+@pytest.mark.parametrize("raw_string", ["red", "'red", "'red\"", "'", ""])
+def test_string_value_requires_quotes(raw_string: str) -> None:
+    with pytest.raises(ValueError, match="Expected a quoted string literal"):
+        StringValue(raw_string)
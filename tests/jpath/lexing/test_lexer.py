@@ -0,0 +1,81 @@
+#  File: test_lexer.py
+#  Copyright (c) 2025 Robert L. Ross
+#  All rights reserved.
+#  Open-source license to come.
+#  Created by: Robert L. Ross
+#
+
+"""Test the lexer's handling of input that can't be tokenized. Valid input is covered by test_lexer_rfc9535_tables.py"""
+import pytest
+
+from killerbunny.lexing.lexer import JPathLexer
+from killerbunny.lexing.tokens import TokenType
+from killerbunny.shared.errors import IllegalCharError, UnterminatedStringLiteralError
+
+
+@pytest.mark.parametrize("json_path, expected_tokens, expected_error", [
+    # chars which only start a two char lexeme
+    ("$.a = 1",         "DOLLAR, DOT, ID:a, UNKNOWN",
+     "Illegal Character: tokenize: '=' at position 5: $.a ^=^ 1"),
+    ("$[?@.a & @.b]",   "DOLLAR, LBRACKET, QMARK, AT, DOT, ID:a, UNKNOWN",
+     "Illegal Character: tokenize: '&' at position 8: $[?@.a ^&^ @.b]"),
+    # char which can't start any token
+    ("$.a#",            "DOLLAR, DOT, ID:a, UNKNOWN",
+     "Illegal Character: tokenize: '#' at position 4: $.a^#^"),
+    # surrogate code points can't start a member name
+    ("$.\ud800",        "DOLLAR, DOT, UNKNOWN",
+     None),
+])
+def test_illegal_char(json_path: str, expected_tokens: str, expected_error: str | None) -> None:
+    tokens, error = JPathLexer("", json_path).tokenize()
+    assert isinstance(error, IllegalCharError)
+    assert ', '.join(token.__testrepr__() for token in tokens) == expected_tokens
+    if expected_error is not None:
+        assert error.as_test_string() == expected_error
+
+
+def test_unterminated_string_literal() -> None:
+    tokens, error = JPathLexer("", "$['abc").tokenize()
+    assert isinstance(error, UnterminatedStringLiteralError)
+    assert ', '.join(token.__testrepr__() for token in tokens) == "DOLLAR, LBRACKET"
+    assert error.as_test_string() == """Unterminated String Literal: match_string_literal: expected "'" at position 7: $['abc^^"""
+
+
+def test_non_ascii_member_name() -> None:
+    tokens, error = JPathLexer("", "$.é€").tokenize()
+    assert error is None
+    assert ', '.join(token.__testrepr__() for token in tokens) == "DOLLAR, DOT, ID:é€, EOF"
+
+
+def test_advance_by_length_specifier() -> None:
+    lexer = JPathLexer("", "$..a <= 1")
+    lexer.advance(TokenType.DOLLAR)
+    lexer.advance(TokenType.DOUBLE_DOT)
+    assert lexer.position.start == TokenType.DOLLAR.lexeme_len + TokenType.DOUBLE_DOT.lexeme_len == 3
+    lexer.advance(2)
+    assert lexer.current_char == "<"
+    lexer.advance(TokenType.LTE)
+    assert lexer.unparsed_text == " 1"
+
+
+def test_token_positions() -> None:
+    tokens, error = JPathLexer("", "$['ab'] ..c").tokenize()
+    assert error is None
+    spans = [(token.__testrepr__(), token.position.start, token.position.end) for token in tokens]
+    assert spans == [("DOLLAR", 0, 1), ("LBRACKET", 1, 2), ("STRING:'ab'", 2, 6), ("RBRACKET", 6, 7),
+                     ("DOUBLE_DOT", 8, 10), ("ID:c", 10, 11), ("EOF", 11, 11)]
+    assert tokens[2].position is tokens[2].position
+    assert tokens[2].copy().position.end == 6
+
+
+@pytest.mark.parametrize("json_path, expected_tokens", [
+    ("$[?@==10]",     "DOLLAR, LBRACKET, QMARK, AT, EQUAL, INT:10, RBRACKET, EOF"),
+    ("$[?@==-1.5]",   "DOLLAR, LBRACKET, QMARK, AT, EQUAL, FLOAT:-1.5, RBRACKET, EOF"),
+    ("$[?@==2E-3]",   "DOLLAR, LBRACKET, QMARK, AT, EQUAL, FLOAT:2E-3, RBRACKET, EOF"),
+    # the grammar's int excludes -0, so it's only valid as a number
+    ("$[?@==-0]",     "DOLLAR, LBRACKET, QMARK, AT, EQUAL, FLOAT:-0, RBRACKET, EOF"),
+])
+def test_number_literal(json_path: str, expected_tokens: str) -> None:
+    tokens, error = JPathLexer("", json_path).tokenize()
+    assert error is None
+    assert ', '.join(token.__testrepr__() for token in tokens) == expected_tokens
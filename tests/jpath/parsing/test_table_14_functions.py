@@ -193,4 +193,20 @@ def test_bal_cases(case: ParserTestCase) -> None:
         assert result.error is None, f"Expected no error, got: {result.error}"
         assert result.node is not None, f"ASTNode was none, expected node: {case.parser_ast}"
         ast_node: ASTNode = result.node
-        assert str(ast_node) == case.parser_ast, f"Expected ASTNode to be {case.parser_ast}, got '{str(ast_node)}'"
\ No newline at end of file
+        assert str(ast_node) == case.parser_ast, f"Expected ASTNode to be {case.parser_ast}, got '{str(ast_node)}'"
+
+def test_eval_signature_set_at_class_definition() -> None:
+    assert BarFunction3._eval_param_count == 1
+    assert dict(BarFunction3._eval_param_types) == {"value": LogicalType}
+    assert BarFunction3._eval_return_type is LogicalType
+    
+    class ArityMismatchFunction(FunctionNode):
+        def __init__(self) -> None:
+            return_param = FunctionParam("return", FunctionParamType.LogicalType, LogicalType)
+            super().__init__("mismatch", return_param, [])
+        
+        def eval(self, value: ValueType) -> LogicalType:  # type: ignore
+            return LogicalType.value_for(True)
+    
+    with pytest.raises(ValueError, match="exactly 0 parameters"):
+        ArityMismatchFunction()